@@ -0,0 +1,112 @@
+-- Инкрементальные счётчики для GET /api/admin/stats
+-- Применяется: python dashboard-counters.py install
+--
+-- Одна строка dashboard_counters поддерживается statement-level триггерами
+-- (через transition tables — один UPDATE на оператор, а не на строку), так что
+-- дашборд читает одну строку вместо четырёх COUNT(*). Функция
+-- dashboard_counters_reconcile() пересчитывает значения и исправляет дрейф.
+-- Имена без схемы: скрипт работает в текущем search_path (для бенчмарка).
+
+SET client_min_messages = warning;
+
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    active_partners bigint NOT NULL DEFAULT 0,
+    pending_applications bigint NOT NULL DEFAULT 0,
+    pending_orders bigint NOT NULL DEFAULT 0,
+    pending_questions bigint NOT NULL DEFAULT 0,
+    reconciled_at timestamp with time zone
+);
+
+INSERT INTO dashboard_counters (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+-- TG_ARGV: [0] колонка счётчика, [1] значение status, которое считаем
+CREATE OR REPLACE FUNCTION dashboard_counters_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    added bigint := 0;
+    removed bigint := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT count(*) INTO added FROM new_rows WHERE status::text = TG_ARGV[1];
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT count(*) INTO removed FROM old_rows WHERE status::text = TG_ARGV[1];
+    END IF;
+    IF added <> removed THEN
+        EXECUTE format('UPDATE dashboard_counters SET %1$I = %1$I + $1', TG_ARGV[0])
+        USING added - removed;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION dashboard_counters_truncate() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    EXECUTE format('UPDATE dashboard_counters SET %I = 0', TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION dashboard_counters_reconcile()
+RETURNS TABLE (counter text, stored bigint, actual bigint)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_before dashboard_counters;
+    v_after dashboard_counters;
+BEGIN
+    -- Блокирует только триггерные UPDATE счётчиков (не чтение): транзакции,
+    -- уже изменившие счётчики, успевают закоммититься до пересчёта, а
+    -- остальные применят свою дельту поверх пересчитанного значения.
+    LOCK TABLE dashboard_counters IN EXCLUSIVE MODE;
+    SELECT * INTO v_before FROM dashboard_counters;
+    UPDATE dashboard_counters SET
+        active_partners = (SELECT count(*) FROM partner_profiles WHERE status = 'active'),
+        pending_applications = (SELECT count(*) FROM partner_applications WHERE status = 'pending'),
+        pending_orders = (SELECT count(*) FROM orders WHERE status = 'pending'),
+        pending_questions = (SELECT count(*) FROM questions WHERE status = 'pending'),
+        reconciled_at = now()
+    RETURNING * INTO v_after;
+    RETURN QUERY VALUES
+        ('active_partners', v_before.active_partners, v_after.active_partners),
+        ('pending_applications', v_before.pending_applications, v_after.pending_applications),
+        ('pending_orders', v_before.pending_orders, v_after.pending_orders),
+        ('pending_questions', v_before.pending_questions, v_after.pending_questions);
+END;
+$$;
+
+DO $$
+DECLARE
+    spec text[];
+BEGIN
+    FOREACH spec SLICE 1 IN ARRAY ARRAY[
+        ['partner_profiles', 'active_partners', 'active'],
+        ['partner_applications', 'pending_applications', 'pending'],
+        ['orders', 'pending_orders', 'pending'],
+        ['questions', 'pending_questions', 'pending']
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_counters_ins ON %I', spec[1]);
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_counters_upd ON %I', spec[1]);
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_counters_del ON %I', spec[1]);
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_counters_trunc ON %I', spec[1]);
+        EXECUTE format('CREATE TRIGGER dashboard_counters_ins AFTER INSERT ON %I
+            REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT
+            EXECUTE PROCEDURE dashboard_counters_apply(%L, %L)', spec[1], spec[2], spec[3]);
+        EXECUTE format('CREATE TRIGGER dashboard_counters_upd AFTER UPDATE ON %I
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT
+            EXECUTE PROCEDURE dashboard_counters_apply(%L, %L)', spec[1], spec[2], spec[3]);
+        EXECUTE format('CREATE TRIGGER dashboard_counters_del AFTER DELETE ON %I
+            REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT
+            EXECUTE PROCEDURE dashboard_counters_apply(%L, %L)', spec[1], spec[2], spec[3]);
+        EXECUTE format('CREATE TRIGGER dashboard_counters_trunc AFTER TRUNCATE ON %I
+            FOR EACH STATEMENT EXECUTE PROCEDURE dashboard_counters_truncate(%L)', spec[1], spec[2]);
+    END LOOP;
+
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+        GRANT SELECT, UPDATE ON dashboard_counters TO app_user;
+    END IF;
+END;
+$$;
+
+SELECT * FROM dashboard_counters_reconcile();
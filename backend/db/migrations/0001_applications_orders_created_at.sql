@@ -0,0 +1,14 @@
+-- Индексы под списки заявок и заказов: GET /api/applications и /api/orders
+-- сортируют по created_at DESC с LIMIT/OFFSET и опциональным фильтром по status.
+-- migrate: no-transaction
+-- migrate: lock_timeout=5s statement_timeout=0
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_partner_applications_created_at
+    ON public.partner_applications (created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_partner_applications_status_created_at
+    ON public.partner_applications (status, created_at DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_created_at
+    ON public.orders (created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_status_created_at
+    ON public.orders (status, created_at DESC);
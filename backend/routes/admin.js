@@ -53,16 +53,34 @@ router.post('/login', async (req, res) => {
   }
 });
 
+// Счётчики поддерживаются триггерами (backend/db/dashboard-counters.sql)
+const STATS_QUERY = `
+  SELECT active_partners, pending_applications, pending_orders, pending_questions
+  FROM dashboard_counters
+`;
+
+// Полный пересчёт — пока dashboard-counters.sql не применён
+const STATS_FALLBACK_QUERY = `
+  SELECT 
+    (SELECT COUNT(*) FROM partner_profiles WHERE status = 'active') as active_partners,
+    (SELECT COUNT(*) FROM partner_applications WHERE status = 'pending') as pending_applications,
+    (SELECT COUNT(*) FROM orders WHERE status = 'pending') as pending_orders,
+    (SELECT COUNT(*) FROM questions WHERE status = 'pending') as pending_questions
+`;
+
 // GET /api/admin/stats - статистика (защищено)
 router.get('/stats', authMiddleware, async (req, res) => {
   try {
-    const stats = await pool.query(`
-      SELECT 
-        (SELECT COUNT(*) FROM partner_profiles WHERE status = 'active') as active_partners,
-        (SELECT COUNT(*) FROM partner_applications WHERE status = 'pending') as pending_applications,
-        (SELECT COUNT(*) FROM orders WHERE status = 'pending') as pending_orders,
-        (SELECT COUNT(*) FROM questions WHERE status = 'pending') as pending_questions
-    `);
+    let stats;
+    try {
+      stats = await pool.query(STATS_QUERY);
+    } catch (error) {
+      // 42P01 - undefined_table
+      if (error.code !== '42P01') throw error;
+    }
+    if (!stats || stats.rows.length === 0) {
+      stats = await pool.query(STATS_FALLBACK_QUERY);
+    }
     
     res.json({ data: stats.rows[0] });
   } catch (error) {
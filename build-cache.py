@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Build the frontend through a content-addressed local dist cache.
+
+The build inputs (src/, public/, index.html, package files, vite/tailwind/
+postcss/tsconfig configs and VITE_* environment) are hashed; when a dist for
+that hash is already in the cache it is restored and `npm run build` is
+skipped entirely. Old artifacts are evicted least-recently-used first once the
+cache grows past BUILD_CACHE_MAX_MB.
+
+Usage:
+    python build-cache.py              # restore or build ./dist
+    python build-cache.py --install    # run `npm ci` first on a cache miss
+    python build-cache.py --force      # always rebuild (and refresh cache)
+    python build-cache.py --hash       # print the input hash and exit
+    python build-cache.py --stats      # show cache contents
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(ROOT, 'dist')
+CACHE_DIR = os.path.join(ROOT, '.ops', 'build-cache')
+INDEX_FILE = os.path.join(CACHE_DIR, 'index.json')
+MAX_CACHE_BYTES = int(os.environ.get('BUILD_CACHE_MAX_MB', '500')) * 1024 * 1024
+
+INPUT_DIRS = ['src', 'public']
+INPUT_FILES = [
+    'index.html',
+    'package.json',
+    'package-lock.json',
+    'vite.config.ts',
+    'tailwind.config.ts',
+    'postcss.config.js',
+    'tsconfig.json',
+    'tsconfig.app.json',
+    'tsconfig.node.json',
+    'components.json',
+    # Vite reads these for import.meta.env
+    '.env',
+    '.env.local',
+    '.env.production',
+    '.env.production.local',
+]
+BUILD_COMMAND = ['npm', 'run', 'build']
+
+
+def iter_input_files():
+    """Yield repo-relative paths of every build input, in a stable order."""
+    paths = [name for name in INPUT_FILES if os.path.isfile(os.path.join(ROOT, name))]
+    for top in INPUT_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(ROOT, top)):
+            dirnames.sort()
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                paths.append(os.path.relpath(full, ROOT).replace(os.sep, '/'))
+    return sorted(paths)
+
+
+def input_hash():
+    """Hash build inputs: file paths, file contents and VITE_* env vars."""
+    digest = hashlib.sha256()
+    for rel in iter_input_files():
+        digest.update(rel.encode() + b'\0')
+        with open(os.path.join(ROOT, rel), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+        digest.update(b'\0')
+    for key in sorted(k for k in os.environ if k.startswith('VITE_')):
+        digest.update(f'{key}={os.environ[key]}\0'.encode())
+    return digest.hexdigest()
+
+
+def load_index():
+    try:
+        with open(INDEX_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = INDEX_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, INDEX_FILE)
+
+
+def tree_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+
+def link_tree(src, dst):
+    """Mirror src into dst using hardlinks, falling back to copies."""
+    def link_or_copy(s, d):
+        try:
+            os.link(s, d)
+        except OSError:
+            shutil.copy2(s, d)
+    shutil.copytree(src, dst, copy_function=link_or_copy)
+
+
+def restore(key):
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    link_tree(os.path.join(CACHE_DIR, key), DIST_DIR)
+
+
+def store(key):
+    """Copy the freshly built dist into the cache under its input hash."""
+    target = os.path.join(CACHE_DIR, key)
+    tmp = target + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    shutil.copytree(DIST_DIR, tmp)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return tree_size(target)
+
+
+def evict(index, keep):
+    """Drop least-recently-used artifacts until the cache fits MAX_CACHE_BYTES."""
+    total = sum(entry['size'] for entry in index.values())
+    for key, entry in sorted(index.items(), key=lambda item: item[1]['last_used']):
+        if total <= MAX_CACHE_BYTES:
+            break
+        if key == keep:
+            continue
+        print(f"  Evicting {key[:12]} ({entry['size'] / 1024 / 1024:.1f} MB)")
+        shutil.rmtree(os.path.join(CACHE_DIR, key), ignore_errors=True)
+        total -= entry['size']
+        del index[key]
+
+
+def run(command):
+    print(f"$ {' '.join(command)}")
+    # npm is a .cmd shim on Windows
+    subprocess.run(command, cwd=ROOT, check=True, shell=os.name == 'nt')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='rebuild even on a cache hit')
+    parser.add_argument('--install', action='store_true', help='run `npm ci` before building on a miss')
+    parser.add_argument('--hash', action='store_true', help='print the input hash and exit')
+    parser.add_argument('--stats', action='store_true', help='list cached artifacts and exit')
+    args = parser.parse_args()
+
+    index = load_index()
+
+    if args.stats:
+        for key, entry in sorted(index.items(), key=lambda item: -item[1]['last_used']):
+            used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))
+            print(f"{key[:12]}  {entry['size'] / 1024 / 1024:8.1f} MB  last used {used}")
+        total = sum(entry['size'] for entry in index.values())
+        print(f"Total: {total / 1024 / 1024:.1f} MB of {MAX_CACHE_BYTES / 1024 / 1024:.0f} MB")
+        return
+
+    started = time.time()
+    key = input_hash()
+    if args.hash:
+        print(key)
+        return
+    print(f"Build inputs hash: {key[:12]}")
+
+    cached = key in index and os.path.isdir(os.path.join(CACHE_DIR, key))
+    if cached and not args.force:
+        print("Cache hit, restoring dist...")
+        restore(key)
+        index[key]['last_used'] = time.time()
+    else:
+        print("Cache miss, building..." if not cached else "Forced rebuild...")
+        if args.install:
+            run(['npm', 'ci'])
+        run(BUILD_COMMAND)
+        size = store(key)
+        index[key] = {'size': size, 'created': time.time(), 'last_used': time.time()}
+        evict(index, keep=key)
+
+    save_index(index)
+    print(f"dist ready in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except subprocess.CalledProcessError as e:
+        print(f"Build failed: {e}")
+        sys.exit(e.returncode or 1)
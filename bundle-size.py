@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Frontend bundle size report with per-release budgets.
+
+Walks dist and reports raw, gzip and brotli size (brotli only when the
+`brotli` package is installed) for every chunk, CSS file and asset, and the
+initial-load size of each entry: the entry chunk, its static imports and their
+CSS, resolved through dist/.vite/manifest.json. Hidden sourcemaps, when
+present, list the modules bundled into each chunk; modules that end up in more
+than one chunk are reported as duplicates.
+
+Sizes are compared with the baseline of the previous release in
+.ops/bundle-size/, and the limits in bundle-budgets.json are enforced: the
+script exits 1 when a budget is exceeded, which stops `deploy:frontend` before
+anything is uploaded. The baseline is recorded by a separate `--save` run once
+the build has actually been released, so a failed or rolled-back deploy never
+becomes the reference for `max_growth`.
+
+Usage:
+    python bundle-size.py                   # report and check budgets
+    python bundle-size.py --save            # after `release.py deploy frontend`: store baseline
+    python bundle-size.py --top 30          # show more chunks
+    python bundle-size.py --budgets other.json
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(ROOT, 'dist')
+MANIFEST = os.path.join('.vite', 'manifest.json')
+BUDGETS_FILE = os.path.join(ROOT, 'bundle-budgets.json')
+BASELINE_DIR = os.path.join(ROOT, '.ops', 'bundle-size')
+
+# Vite's default content hash: `name-<8 chars>.ext`
+CONTENT_HASH = re.compile(r'-[A-Za-z0-9_-]{8}(?=\.\w+$)')
+METRICS = ('raw', 'gzip', 'br')
+
+
+def measure(data):
+    return {
+        'raw': len(data),
+        'gzip': len(gzip.compress(data, compresslevel=6, mtime=0)),
+        'br': len(brotli.compress(data, quality=11)) if brotli else None,
+    }
+
+
+def kind_of(path):
+    ext = os.path.splitext(path)[1]
+    return {'.js': 'js', '.mjs': 'js', '.css': 'css', '.html': 'html'}.get(ext, 'asset')
+
+
+def load_manifest(dist):
+    path = os.path.join(dist, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def collect(dist, manifest):
+    """Measure every shipped file, keyed by hash-free path so releases can be compared."""
+    keys = {chunk['file']: key for key, chunk in manifest.items()}
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(dist):
+        dirnames[:] = [d for d in dirnames if d != '.vite']
+        for filename in filenames:
+            if filename.endswith('.map'):
+                continue
+            full = os.path.join(dirpath, filename)
+            rel = os.path.relpath(full, dist).replace(os.sep, '/')
+            with open(full, 'rb') as f:
+                sizes = measure(f.read())
+            name = CONTENT_HASH.sub('', rel)
+            if name in files:
+                name = f"{name} ({keys.get(rel, rel)})"
+            files[name] = {'file': rel, 'kind': kind_of(rel), **sizes}
+    return files
+
+
+def entry_closures(manifest):
+    """Entry key -> files loaded before the entry can run (JS imports + CSS)."""
+    closures = {}
+    for key, chunk in manifest.items():
+        if not (chunk.get('isEntry') or chunk.get('isDynamicEntry')):
+            continue
+        files, seen, stack = [], set(), [key]
+        while stack:
+            current = stack.pop()
+            if current in seen or current not in manifest:
+                continue
+            seen.add(current)
+            files.append(manifest[current]['file'])
+            files.extend(manifest[current].get('css', []))
+            stack.extend(manifest[current].get('imports', []))
+        closures[key] = {'files': files, 'dynamic': not chunk.get('isEntry')}
+    return closures
+
+
+def sum_sizes(entries):
+    total = {}
+    for metric in METRICS:
+        values = [entry[metric] for entry in entries]
+        total[metric] = None if any(v is None for v in values) else sum(values)
+    return total
+
+
+def module_name(source):
+    """Normalize a sourcemap source path to a stable module id."""
+    source = source.replace('\\', '/').split('?')[0]
+    if 'node_modules/' in source:
+        return source[source.rindex('node_modules/'):]
+    return re.sub(r'^(\.\./)+|^/', '', source)
+
+
+def duplicated_modules(dist, files):
+    """Modules present in more than one chunk, from hidden sourcemaps."""
+    owners, sizes, maps = {}, {}, 0
+    for name, info in files.items():
+        map_path = os.path.join(dist, info['file'] + '.map')
+        if info['kind'] != 'js' or not os.path.exists(map_path):
+            continue
+        maps += 1
+        with open(map_path, encoding='utf-8') as f:
+            sourcemap = json.load(f)
+        contents = sourcemap.get('sourcesContent') or []
+        for index, source in enumerate(sourcemap.get('sources', [])):
+            if source.startswith('\0'):
+                continue
+            module = module_name(source)
+            owners.setdefault(module, set()).add(name)
+            if index < len(contents) and contents[index]:
+                sizes[module] = len(contents[index].encode('utf-8'))
+    duplicates = {module: sorted(chunks) for module, chunks in owners.items() if len(chunks) > 1}
+    return maps, duplicates, sizes
+
+
+def fmt_kb(value):
+    return '-' if value is None else f'{value / 1024:.1f}'
+
+
+def fmt_delta(current, previous):
+    if previous is None or current is None:
+        return ''
+    change = current - previous
+    if not change:
+        return '='
+    return f'{change / 1024:+.1f}' + (f' ({change / previous:+.0%})' if previous else '')
+
+
+def current_release():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime('%Y%m%d-%H%M%S')
+
+
+def load_baseline(release):
+    """Most recent baseline recorded for a different release."""
+    try:
+        names = sorted(os.listdir(BASELINE_DIR), key=lambda n: os.path.getmtime(os.path.join(BASELINE_DIR, n)))
+    except OSError:
+        return None
+    for name in reversed(names):
+        if name.endswith('.json') and name != f'{release}.json':
+            with open(os.path.join(BASELINE_DIR, name), encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def save_baseline(release, files, initial, total):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(os.path.join(BASELINE_DIR, f'{release}.json'), 'w', encoding='utf-8') as f:
+        json.dump({'release': release, 'created': time.time(), 'files': files,
+                   'initial': initial, 'total': total}, f, indent=2)
+
+
+def check_budgets(budgets, files, initial, total, baseline):
+    """List of human-readable budget violations. Budgets are in kB."""
+    violations = []
+
+    def over(label, sizes, limits):
+        for metric, limit in (limits or {}).items():
+            if sizes.get(metric) is not None and sizes[metric] > limit * 1024:
+                violations.append(f"{label}: {metric} {fmt_kb(sizes[metric])} kB > budget {limit} kB")
+
+    for key, sizes in initial.items():
+        over(f"initial load of {key}", sizes, budgets.get('initial'))
+    over('total JS+CSS', total, budgets.get('total'))
+    for name, info in files.items():
+        limits = {'js': budgets.get('chunk'), 'css': budgets.get('css'), 'asset': budgets.get('asset')}.get(info['kind'])
+        over(name, info, limits)
+
+    growth = budgets.get('max_growth')
+    if growth is not None and baseline:
+        for key, sizes in initial.items():
+            previous = baseline.get('initial', {}).get(key, {}).get('gzip')
+            if previous and sizes['gzip'] > previous * (1 + growth):
+                violations.append(f"initial load of {key}: gzip {fmt_kb(previous)} -> {fmt_kb(sizes['gzip'])} kB "
+                                  f"({sizes['gzip'] / previous - 1:+.0%}) since {baseline['release']}, "
+                                  f"limit +{growth:.0%}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dist', default=DIST_DIR)
+    parser.add_argument('--budgets', default=BUDGETS_FILE, help='budget file (default bundle-budgets.json)')
+    parser.add_argument('--release', default=None, help='label for this build (default: git short hash)')
+    parser.add_argument('--top', type=int, default=15, help='chunks/assets to list (default 15)')
+    parser.add_argument('--save', action='store_true', help='store this build as the baseline, without the report')
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.dist, 'index.html')):
+        sys.exit(f"❌ {args.dist}/index.html not found, build the frontend first")
+
+    manifest = load_manifest(args.dist)
+    files = collect(args.dist, manifest)
+    by_file = {info['file']: info for info in files.values()}
+    closures = entry_closures(manifest)
+    initial = {key: sum_sizes([by_file[f] for f in c['files'] if f in by_file])
+               for key, c in closures.items() if not c['dynamic']}
+    total = sum_sizes([info for info in files.values() if info['kind'] in ('js', 'css')])
+    release = args.release or current_release()
+    if args.save:
+        save_baseline(release, files, initial, total)
+        print(f"📦 Bundle size baseline saved for release {release}")
+        return
+    baseline = load_baseline(release)
+    previous = (baseline or {}).get('files', {})
+
+    print(f"📦 Bundle size for release {release}"
+          f" (baseline: {baseline['release'] if baseline else 'none'})"
+          + ('' if brotli else '; install `brotli` for br sizes'))
+    if not manifest:
+        print(f"⚠️  {MANIFEST} not found: entries and initial load are not available")
+
+    print(f"\n{'entry':<40} {'files':>5} {'raw kB':>9} {'gzip kB':>9} {'br kB':>8}  Δ gzip kB")
+    for key, closure in sorted(closures.items(), key=lambda item: item[1]['dynamic']):
+        sizes = sum_sizes([by_file[f] for f in closure['files'] if f in by_file])
+        label = key + (' (lazy)' if closure['dynamic'] else '')
+        before = (baseline or {}).get('initial', {}).get(key, {}).get('gzip') if not closure['dynamic'] else None
+        print(f"{label[-40:]:<40} {len(closure['files']):>5} {fmt_kb(sizes['raw']):>9} {fmt_kb(sizes['gzip']):>9} "
+              f"{fmt_kb(sizes['br']):>8}  {fmt_delta(sizes['gzip'], before)}")
+
+    ranked = sorted(files.items(), key=lambda item: item[1]['gzip'], reverse=True)
+    print(f"\n{'chunk / asset':<40} {'kind':>5} {'raw kB':>9} {'gzip kB':>9} {'br kB':>8}  Δ gzip kB")
+    for name, info in ranked[:args.top]:
+        print(f"{name[-40:]:<40} {info['kind']:>5} {fmt_kb(info['raw']):>9} {fmt_kb(info['gzip']):>9} "
+              f"{fmt_kb(info['br']):>8}  {fmt_delta(info['gzip'], previous.get(name, {}).get('gzip')) or 'new'}")
+    if len(ranked) > args.top:
+        print(f"... {len(ranked) - args.top} more")
+    removed = sorted(set(previous) - set(files))
+    if removed:
+        print(f"Removed since {baseline['release']}: {', '.join(removed)}")
+    print(f"{'total JS+CSS':<40} {'':>5} {fmt_kb(total['raw']):>9} {fmt_kb(total['gzip']):>9} "
+          f"{fmt_kb(total['br']):>8}  {fmt_delta(total['gzip'], (baseline or {}).get('total', {}).get('gzip'))}")
+
+    maps, duplicates, module_sizes = duplicated_modules(args.dist, files)
+    if maps:
+        print(f"\n🔁 Modules bundled into more than one chunk ({maps} sourcemaps)")
+        if duplicates:
+            for module, chunks in sorted(duplicates.items(), key=lambda item: -module_sizes.get(item[0], 0))[:args.top]:
+                print(f"   {module} ({fmt_kb(module_sizes.get(module))} kB source) in {', '.join(chunks)}")
+        else:
+            print("   none")
+    else:
+        print("\nℹ️  No sourcemaps in dist, duplicate module check skipped")
+
+    budgets = {}
+    if os.path.exists(args.budgets):
+        with open(args.budgets, encoding='utf-8') as f:
+            budgets = json.load(f)
+    violations = check_budgets(budgets, files, initial, total, baseline)
+    if violations:
+        print(f"\n❌ {len(violations)} budget violation(s) ({os.path.basename(args.budgets)}):")
+        for violation in violations:
+            print(f"   {violation}")
+        sys.exit(1)
+
+    print("\n✅ Within budgets" + ('' if budgets else ' (no budget file)'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Trigger-maintained admin dashboard counters: install, reconcile, benchmark.
+
+GET /api/admin/stats used to run four COUNT(*) subqueries on every load. With
+backend/db/dashboard-counters.sql installed it reads one row kept current by
+statement-level triggers; `reconcile` recounts and corrects any drift (also
+run nightly from cron once installed).
+
+Usage:
+    python dashboard-counters.py install      # apply SQL + nightly reconcile cron
+    python dashboard-counters.py reconcile    # recount now, report drift
+    python dashboard-counters.py bench --dsn postgresql://localhost/scratch [--rows 1000000]
+
+`bench` needs a local `psql` and a scratch database; it works in its own
+dashboard_bench schema and drops it afterwards.
+"""
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import psql
+
+SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'db', 'dashboard-counters.sql')
+CRON_FILE = '/etc/cron.d/dashboard-counters'
+BENCH_SCHEMA = 'dashboard_bench'
+
+# Same shape as the pre-counter stats query in backend/routes/admin.js
+OLD_QUERY = """SELECT
+  (SELECT COUNT(*) FROM partner_profiles WHERE status = 'active') as active_partners,
+  (SELECT COUNT(*) FROM partner_applications WHERE status = 'pending') as pending_applications,
+  (SELECT COUNT(*) FROM orders WHERE status = 'pending') as pending_orders,
+  (SELECT COUNT(*) FROM questions WHERE status = 'pending') as pending_questions"""
+NEW_QUERY = """SELECT active_partners, pending_applications, pending_orders, pending_questions
+FROM dashboard_counters"""
+BENCH_TABLES = {
+    'partner_profiles': ['active', 'inactive', 'archived'],
+    'partner_applications': ['pending', 'approved', 'rejected'],
+    'orders': ['pending', 'approved', 'active', 'expired'],
+    'questions': ['pending', 'approved', 'active', 'expired'],
+}
+
+
+def remote_psql(ssh, sql):
+    status, output, errors = psql.run(ssh, sql, "-F '|'")
+    if status != 0:
+        raise RuntimeError(errors or output)
+    return output
+
+
+def print_drift(output):
+    print(f"   {'counter':<22} {'stored':>10} {'actual':>10} {'drift':>8}")
+    for line in output.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3:
+            counter, stored, actual = parts[0], int(parts[1]), int(parts[2])
+            print(f"   {counter:<22} {stored:>10} {actual:>10} {actual - stored:>+8}")
+
+
+def cmd_install(args):
+    with open(SQL_FILE, encoding='utf-8') as f:
+        sql = f.read()
+    ssh = psql.connect()
+    try:
+        print("📦 Installing dashboard counters...")
+        print_drift(remote_psql(ssh, sql))
+        cron = (f'17 3 * * * postgres psql -d {psql.DB_NAME} -qAt -c '
+                f'"SELECT * FROM dashboard_counters_reconcile() WHERE stored <> actual" '
+                f'| logger -t dashboard-counters\n')
+        sftp = ssh.open_sftp()
+        try:
+            sftp.putfo(io.BytesIO(cron.encode()), CRON_FILE)
+            sftp.chmod(CRON_FILE, 0o644)
+        finally:
+            sftp.close()
+        print(f"   ✅ Installed, nightly reconcile in {CRON_FILE}")
+    finally:
+        ssh.close()
+
+
+def cmd_reconcile(args):
+    ssh = psql.connect()
+    try:
+        print("🔁 Reconciling dashboard counters...")
+        print_drift(remote_psql(ssh, 'SELECT * FROM dashboard_counters_reconcile();'))
+    finally:
+        ssh.close()
+
+
+def local_psql(dsn, sql):
+    script = f'SET search_path = {BENCH_SCHEMA}, public;\n{sql}'
+    result = subprocess.run(['psql', dsn, '-X', '-qAt', '-v', 'ON_ERROR_STOP=1', '-f', '-'],
+                            input=script, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return result.stdout.strip()
+
+
+def timed(dsn, sql, reps):
+    """Server-side timings (ms) of `reps` executions of sql, without client round trips."""
+    output = local_psql(dsn, f"SELECT string_agg(ms::text, ',') FROM time_query($q${sql}$q$, {reps}) AS t(ms);")
+    return [float(ms) for ms in output.split(',')]
+
+
+def summary(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def cmd_bench(args):
+    rows, reps = args.rows, args.reps
+    write_sql = (f"INSERT INTO orders (status) SELECT CASE WHEN g % 10 = 0 THEN 'pending' ELSE 'approved' END "
+                 f"FROM generate_series(1, {args.write_rows}) g")
+    started = time.time()
+
+    print(f"🏗  Loading {rows:,} rows into each of {len(BENCH_TABLES)} tables...")
+    setup = [f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;", f"CREATE SCHEMA {BENCH_SCHEMA};",
+             f"SET search_path = {BENCH_SCHEMA}, public;"]
+    for table, statuses in BENCH_TABLES.items():
+        values = ', '.join(f"'{status}'" for status in statuses)
+        setup.append(f"""
+CREATE TABLE {table} (id bigserial PRIMARY KEY, status text NOT NULL, created_at timestamptz DEFAULT now());
+INSERT INTO {table} (status)
+SELECT (ARRAY[{values}])[1 + (g % {len(statuses)})] FROM generate_series(1, {rows}) g;
+CREATE INDEX ON {table} (status);""")
+    setup.append("""
+CREATE FUNCTION time_query(q text, reps int) RETURNS SETOF double precision LANGUAGE plpgsql AS $f$
+DECLARE
+    t timestamptz;
+BEGIN
+    FOR i IN 1..reps LOOP
+        t := clock_timestamp();
+        EXECUTE q;
+        RETURN NEXT extract(epoch FROM clock_timestamp() - t) * 1000;
+    END LOOP;
+END;
+$f$;""")
+    local_psql(args.dsn, '\n'.join(setup))
+    local_psql(args.dsn, 'VACUUM ANALYZE;')
+    print(f"   loaded in {time.time() - started:.0f}s")
+
+    print("⏱  Timing COUNT(*) stats query...")
+    old = timed(args.dsn, OLD_QUERY, reps)
+    write_before = timed(args.dsn, write_sql, 3)
+
+    print("📦 Installing counters...")
+    with open(SQL_FILE, encoding='utf-8') as f:
+        local_psql(args.dsn, f.read())
+
+    print("⏱  Timing counter lookup...")
+    new = timed(args.dsn, NEW_QUERY, reps)
+    write_after = timed(args.dsn, write_sql, 3)
+
+    # Mixed DML through the triggers, then check reconcile finds no drift
+    local_psql(args.dsn, """
+UPDATE orders SET status = 'approved' WHERE id % 7 = 0;
+DELETE FROM questions WHERE id % 11 = 0;
+UPDATE partner_profiles SET status = 'active' WHERE id % 13 = 0;
+DELETE FROM partner_applications WHERE status = 'pending' AND id % 5 = 0;""")
+    drift = local_psql(args.dsn, 'SELECT counter, stored, actual FROM dashboard_counters_reconcile();')
+
+    old_p50, old_p95 = summary(old)
+    new_p50, new_p95 = summary(new)
+    print(f"\n{'':<28} {'p50 ms':>10} {'p95 ms':>10}")
+    print(f"{'4x COUNT(*) (before)':<28} {old_p50:>10.3f} {old_p95:>10.3f}")
+    print(f"{'dashboard_counters (after)':<28} {new_p50:>10.3f} {new_p95:>10.3f}")
+    print(f"Speedup: {old_p50 / max(new_p50, 1e-6):,.0f}x at {rows:,} rows per table")
+    print(f"\nWrite cost, INSERT {args.write_rows:,} orders: "
+          f"{statistics.median(write_before):.1f} ms without triggers, "
+          f"{statistics.median(write_after):.1f} ms with triggers")
+    print("\nCorrectness after mixed DML:")
+    print_drift(drift)
+
+    if not args.keep:
+        local_psql(args.dsn, f'DROP SCHEMA {BENCH_SCHEMA} CASCADE;')
+    if any(line.split('|')[1] != line.split('|')[2] for line in drift.splitlines()):
+        sys.exit("❌ Counters drifted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('install', help='apply dashboard-counters.sql on the server')
+    sub.add_parser('reconcile', help='recount on the server and report drift')
+    p = sub.add_parser('bench', help='compare COUNT(*) and counter lookup on a scratch database')
+    p.add_argument('--dsn', required=True, help='scratch database for psql')
+    p.add_argument('--rows', type=int, default=1_000_000, help='rows per table (default 1,000,000)')
+    p.add_argument('--reps', type=int, default=30, help='timed executions per query')
+    p.add_argument('--write-rows', type=int, default=10_000, help='rows per timed INSERT batch')
+    p.add_argument('--keep', action='store_true', help=f'keep the {BENCH_SCHEMA} schema')
+    args = parser.parse_args()
+
+    try:
+        {'install': cmd_install, 'reconcile': cmd_reconcile, 'bench': cmd_bench}[args.command](args)
+    except RuntimeError as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,22 +5,16 @@
 """
 
 import paramiko
-import os
-from scp import SCPClient
 
-SERVER = '85.198.67.7'
-USER = 'root'
-PASSWORD = 'j8!RMiWztLw1'
+import release
 
 print("\n" + "="*70)
 print("🚀 ДЕПЛОЙ BACKEND API НА СЕРВЕР")
 print("="*70)
 
 try:
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     print("\n🔌 Подключение к серверу...")
-    ssh.connect(SERVER, username=USER, password=PASSWORD, timeout=30)
+    ssh = release.connect()
     print("   ✅ Подключено")
 
     # 1. Установка Node.js (если ещё не установлен)
@@ -40,55 +34,24 @@ npm --version
     output = stdout.read().decode()
     print(f"   {output}")
 
-    # 2. Создание структуры директорий
-    print("\n2️⃣  Создание структуры директорий...")
+    # 2. Установка PM2 (process manager)
+    print("\n2️⃣  Установка PM2...")
     commands = """
-mkdir -p /var/www/backend/routes
-mkdir -p /var/www/backend/services
-mkdir -p /var/www/backend/db
-mkdir -p /var/www/backend/uploads
-chmod 755 /var/www/backend/uploads
-echo "Директории созданы"
+npm install -g pm2 2>&1 | tail -5
+pm2 --version
 """
     
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=30)
+    stdin, stdout, stderr = ssh.exec_command(commands, timeout=120)
     stdout.channel.recv_exit_status()
-    print("   ✅ Директории созданы")
-
-    # 3. Загрузка файлов backend
-    print("\n3️⃣  Загрузка файлов backend...")
-    
-    files_to_upload = [
-        ('backend/server.js', '/var/www/backend/server.js'),
-        ('backend/package.json', '/var/www/backend/package.json'),
-        ('backend/routes/partners.js', '/var/www/backend/routes/partners.js'),
-        ('backend/routes/applications.js', '/var/www/backend/routes/applications.js'),
-        ('backend/routes/orders.js', '/var/www/backend/routes/orders.js'),
-        ('backend/routes/questions.js', '/var/www/backend/routes/questions.js'),
-        ('backend/routes/categories.js', '/var/www/backend/routes/categories.js'),
-        ('backend/routes/professions.js', '/var/www/backend/routes/professions.js'),
-        ('backend/routes/settings.js', '/var/www/backend/routes/settings.js'),
-        ('backend/routes/card-templates.js', '/var/www/backend/routes/card-templates.js'),
-        ('backend/routes/admin.js', '/var/www/backend/routes/admin.js'),
-        ('backend/routes/upload.js', '/var/www/backend/routes/upload.js'),
-        ('backend/routes/telegram.js', '/var/www/backend/routes/telegram.js'),
-        ('backend/services/telegram.js', '/var/www/backend/services/telegram.js'),
-    ]
-    
-    with SCPClient(ssh.get_transport()) as scp:
-        for local_path, remote_path in files_to_upload:
-            if os.path.exists(local_path):
-                print(f"   📤 {local_path} → {remote_path}")
-                scp.put(local_path, remote_path)
-            else:
-                print(f"   ⚠️  Файл не найден: {local_path}")
-    
-    print("   ✅ Файлы загружены")
+    output = stdout.read().decode()
+    print(f"   {output}")
 
-    # 4. Создание .env файла на сервере
-    print("\n4️⃣  Создание .env файла...")
-    commands = """
-cat > /var/www/backend/.env << 'EOF'
+    # 3. Создание .env и uploads/ в общей директории релизов
+    print("\n3️⃣  Создание .env файла...")
+    commands = f"""
+mkdir -p {release.SHARED_BACKEND}/uploads
+chmod 755 {release.SHARED_BACKEND}/uploads
+cat > {release.SHARED_BACKEND}/.env << 'EOF'
 PORT=3000
 NODE_ENV=production
 
@@ -117,38 +80,16 @@ echo ".env создан"
     stdout.channel.recv_exit_status()
     print("   ✅ .env создан")
 
-    # 5. Установка dependencies
-    print("\n5️⃣  Установка npm dependencies...")
-    commands = """
-cd /var/www/backend
-npm install 2>&1 | tail -20
-echo "Dependencies установлены"
-"""
-    
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=300)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    print(f"   {output}")
-
-    # 6. Установка PM2 (process manager)
-    print("\n6️⃣  Установка PM2...")
-    commands = """
-npm install -g pm2 2>&1 | tail -5
-pm2 --version
-"""
-    
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=120)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    print(f"   {output}")
+    # 4. Выкладка релиза. /var/www/backend — симлинк на релиз, файлы которого
+    # являются хардлинками старых релизов, поэтому на месте их не перезаписываем:
+    # release.py собирает новый релиз из дельты, ставит зависимости в свежий
+    # node_modules и перезагружает backend в PM2
+    print("\n4️⃣  Выкладка релиза backend...")
+    release.deploy(ssh, 'backend')
 
-    # 7. Запуск backend через PM2
-    print("\n7️⃣  Запуск backend API...")
+    # 5. Автозапуск PM2
+    print("\n5️⃣  Автозапуск PM2...")
     commands = """
-cd /var/www/backend
-pm2 stop backend 2>/dev/null || true
-pm2 delete backend 2>/dev/null || true
-pm2 start server.js --name backend --node-args="--experimental-modules"
 pm2 save
 pm2 startup | tail -1 > /tmp/pm2-startup.sh
 bash /tmp/pm2-startup.sh
@@ -160,8 +101,8 @@ pm2 list
     output = stdout.read().decode()
     print(f"   {output}")
 
-    # 8. Настройка Nginx reverse proxy
-    print("\n8️⃣  Настройка Nginx reverse proxy...")
+    # 6. Настройка Nginx reverse proxy
+    print("\n6️⃣  Настройка Nginx reverse proxy...")
     commands = """
 cat > /etc/nginx/sites-available/api << 'EOF'
 server {
@@ -192,8 +133,8 @@ echo "Nginx настроен"
     output = stdout.read().decode()
     print(f"   {output}")
 
-    # 9. Тест API
-    print("\n9️⃣  Тест API...")
+    # 7. Тест API
+    print("\n7️⃣  Тест API...")
     commands = """
 sleep 2
 curl -s http://localhost:3000/health | head -5
@@ -217,7 +158,7 @@ curl -s http://localhost:3000/health | head -5
     print("="*70)
     print("\n📊 Backend API:")
     print("   Local: http://localhost:3000")
-    print("   Server: http://85.198.67.7:3000")
+    print(f"   Server: http://{release.SERVER}:3000")
     print("   Health: http://localhost:3000/health")
     print("\n🔜 Следующий шаг: Обновление frontend для использования нового API")
     print("="*70 + "\n")
@@ -0,0 +1,53 @@
+"""Keep-alive HTTP(S) GET with reconnects, shared by smoke-gate.py and warm-cache.py."""
+import gzip
+import http.client
+import time
+
+
+class Connection:
+    """One keep-alive connection that reconnects when the server drops it."""
+
+    def __init__(self, base, context, timeout, user_agent):
+        self.base, self.context, self.timeout, self.user_agent = base, context, timeout, user_agent
+        self.conn = None
+
+    def connect(self):
+        if self.base.scheme == 'https':
+            conn = http.client.HTTPSConnection(self.base.hostname, self.base.port,
+                                               timeout=self.timeout, context=self.context)
+        else:
+            conn = http.client.HTTPConnection(self.base.hostname, self.base.port, timeout=self.timeout)
+        # Handshake outside the timed section: we measure the server, not TLS
+        conn.connect()
+        self.conn = conn
+
+    def get(self, path, headers=None):
+        """GET `path`; returns (status, wire bytes, decoded body, elapsed ms)."""
+        for attempt in range(2):
+            if self.conn is None:
+                self.connect()
+            try:
+                started = time.perf_counter()
+                self.conn.request('GET', path, headers={'User-Agent': self.user_agent, **(headers or {})})
+                response = self.conn.getresponse()
+                raw = response.read()
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close()
+                body = gzip.decompress(raw) if response.getheader('Content-Encoding') == 'gzip' else raw
+                return response.status, raw, body, elapsed
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Server dropped an idle keep-alive connection; reconnect once
+                self.close()
+                if attempt:
+                    raise
+            except BaseException:
+                # A timeout or protocol error leaves the connection mid-request;
+                # reusing it would fail every later request with CannotSendRequest
+                self.close()
+                raise
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Versioned, lock-aware schema migrations.
+
+Migrations live in backend/db/migrations/NNNN_name.sql and are applied in
+order; each applied version is recorded in schema_migrations with the file
+checksum. backend/db/schema.sql stays the snapshot for fresh installs, every
+change on top of it goes through a migration.
+
+Directives are SQL comments at the top of a migration:
+
+    -- migrate: no-transaction                  run statements in autocommit
+                                                (CREATE INDEX CONCURRENTLY)
+    -- migrate: lock_timeout=5s statement_timeout=0
+
+A statement preceded by `-- migrate: backfill batch=5000 sleep=100ms` (only
+in no-transaction migrations) is repeated with `:batch` substituted until it
+touches no rows, committing after every batch and reporting progress:
+
+    -- migrate: backfill batch=5000 sleep=100ms
+    UPDATE orders SET city = trim(city)
+    WHERE id IN (SELECT id FROM orders WHERE city <> trim(city) LIMIT :batch);
+
+A migration that hits lock_timeout (or a deadlock) is retried with backoff,
+so DDL never queues behind a long transaction and stalls the API. Invalid
+indexes left by an interrupted CREATE INDEX CONCURRENTLY are dropped before
+each attempt, which is why no-transaction migrations must be idempotent
+(IF NOT EXISTS).
+
+Usage:
+    python migrate.py status
+    python migrate.py up [--to 0003] [--dry-run]
+    python migrate.py new add-orders-city-index
+    python migrate.py up --dsn postgresql://localhost/scratch   # local psql instead of SSH
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+
+import psql
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'db', 'migrations')
+DEFAULT_SETTINGS = {'lock_timeout': '5s', 'statement_timeout': '15min'}
+RETRY_SQLSTATES = {'55P03', '40P01'}  # lock_not_available, deadlock_detected
+
+DIRECTIVE = re.compile(r'^--\s*migrate:\s*(.+)$')
+FILENAME = re.compile(r'^(\d{4})_([\w-]+)\.sql$')
+CONCURRENT_INDEX = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?("?[\w.]+"?)', re.IGNORECASE)
+
+STATE_DDL = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version text PRIMARY KEY,
+    name text NOT NULL,
+    checksum text NOT NULL,
+    duration_ms integer,
+    applied_at timestamp with time zone DEFAULT now()
+);"""
+
+TEMPLATE = """-- {description}
+-- migrate: lock_timeout=5s statement_timeout=15min
+--
+-- For CREATE INDEX CONCURRENTLY or batched backfills add
+-- `-- migrate: no-transaction` and keep every statement idempotent.
+
+"""
+
+BACKFILL_TEMPLATE = """DO $backfill$
+DECLARE
+    n bigint;
+    total bigint := 0;
+    batches integer := 0;
+    retries integer := 0;
+    started timestamptz := clock_timestamp();
+BEGIN
+    LOOP
+        BEGIN
+            EXECUTE $stmt${statement}$stmt$;
+            GET DIAGNOSTICS n = ROW_COUNT;
+            retries := 0;
+        EXCEPTION WHEN lock_not_available OR deadlock_detected THEN
+            retries := retries + 1;
+            IF retries > 10 THEN
+                RAISE;
+            END IF;
+            RAISE NOTICE 'backfill: batch % waiting for locks (retry %)', batches + 1, retries;
+            n := -1;
+        END;
+        COMMIT;
+        EXIT WHEN n = 0;
+        IF n > 0 THEN
+            total := total + n;
+            batches := batches + 1;
+            IF batches % {report_every} = 0 THEN
+                RAISE NOTICE 'backfill: % rows in % batches, % rows/s', total, batches,
+                    round(total / greatest(extract(epoch FROM clock_timestamp() - started), 0.001));
+            END IF;
+        END IF;
+        PERFORM pg_sleep({sleep});
+    END LOOP;
+    RAISE NOTICE 'backfill: done, % rows in % batches, %s', total, batches,
+        round(extract(epoch FROM clock_timestamp() - started)::numeric, 1);
+END
+$backfill$;"""
+
+
+class PsqlError(RuntimeError):
+    def __init__(self, message):
+        super().__init__(message)
+        match = re.search(r'ERROR:\s+([0-9A-Z]{5}):', message)
+        self.sqlstate = match.group(1) if match else None
+
+
+class Migration:
+    def __init__(self, path):
+        self.path = path
+        self.version, self.name = FILENAME.match(os.path.basename(path)).groups()
+        with open(path, 'rb') as f:
+            raw = f.read()
+        self.checksum = hashlib.sha256(raw).hexdigest()
+        self.sql = raw.decode('utf-8')
+        self.transactional = True
+        self.settings = dict(DEFAULT_SETTINGS)
+        for line in self.sql.splitlines():
+            if not line.startswith('--'):
+                if line.strip():
+                    break
+                continue
+            match = DIRECTIVE.match(line.strip())
+            if not match or match.group(1).startswith('backfill'):
+                continue
+            for token in match.group(1).split():
+                if token == 'no-transaction':
+                    self.transactional = False
+                elif '=' in token and token.split('=', 1)[0] in DEFAULT_SETTINGS:
+                    key, value = token.split('=', 1)
+                    self.settings[key] = value
+                else:
+                    raise ValueError(f'{path}: unknown directive {token!r}')
+
+    @property
+    def label(self):
+        return f'{self.version}_{self.name}'
+
+    def body(self):
+        """Migration SQL with backfill statements expanded into batch loops."""
+        out, lines = [], iter(self.sql.splitlines())
+        for line in lines:
+            match = DIRECTIVE.match(line.strip())
+            if not match or not match.group(1).startswith('backfill'):
+                out.append(line)
+                continue
+            if self.transactional:
+                raise ValueError(f'{self.path}: backfill needs `-- migrate: no-transaction`')
+            options = dict(token.split('=', 1) for token in match.group(1).split()[1:])
+            statement = []
+            for line in lines:
+                statement.append(line)
+                if line.rstrip().endswith(';'):
+                    break
+            batch = int(options.get('batch', 1000))
+            sleep = parse_duration(options.get('sleep', '0ms'))
+            sql = '\n'.join(statement).rstrip().rstrip(';').replace(':batch', str(batch))
+            # statement_timeout would apply to the whole loop; each batch is bounded by its size
+            out.append("SET statement_timeout = 0;")
+            out.append(BACKFILL_TEMPLATE.format(statement=sql, sleep=sleep,
+                                                report_every=int(options.get('report', 10))))
+            out.append(f"SET statement_timeout = '{self.settings['statement_timeout']}';")
+        return '\n'.join(out)
+
+    def script(self):
+        settings = ''.join(f"SET {key} = '{value}';\n" for key, value in self.settings.items())
+        prologue = "\\set VERBOSITY verbose\nSELECT extract(epoch FROM clock_timestamp()) AS migrate_started \\gset\n"
+        record = (f"INSERT INTO schema_migrations (version, name, checksum, duration_ms) "
+                  f"VALUES ('{self.version}', '{self.name}', '{self.checksum}', "
+                  f"(extract(epoch FROM clock_timestamp()) - :migrate_started) * 1000);\n")
+        if self.transactional:
+            return f"{prologue}BEGIN;\n{settings}{self.body()}\n;\n{record}COMMIT;\n"
+        # Leftovers of an interrupted CREATE INDEX CONCURRENTLY would make IF NOT EXISTS skip the build
+        indexes = [name.strip('"').split('.')[-1] for name in CONCURRENT_INDEX.findall(self.sql)
+                   if name.upper() != 'ON']
+        cleanup = ''
+        if indexes:
+            names = ', '.join(f"'{name}'" for name in indexes)
+            cleanup = (f"SELECT format('DROP INDEX CONCURRENTLY IF EXISTS %I.%I', n.nspname, c.relname)\n"
+                       f"FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                       f"JOIN pg_namespace n ON n.oid = c.relnamespace\n"
+                       f"WHERE NOT i.indisvalid AND c.relname IN ({names}) \\gexec\n")
+        return f"{prologue}{settings}{cleanup}{self.body()}\n;\n{record}"
+
+
+def parse_duration(value):
+    """'100ms' / '2s' / '0.5' -> seconds for pg_sleep."""
+    if value.endswith('ms'):
+        return float(value[:-2]) / 1000
+    return float(value.rstrip('s'))
+
+
+def load_migrations():
+    migrations = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if name.endswith('.sql'):
+            if not FILENAME.match(name):
+                raise ValueError(f'{name}: expected NNNN_name.sql')
+            migrations.append(Migration(os.path.join(MIGRATIONS_DIR, name)))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError('duplicate migration versions')
+    return migrations
+
+
+class Database:
+    """Runs psql scripts on the server over SSH, or locally with --dsn."""
+
+    def __init__(self, dsn=None):
+        self.dsn, self.ssh = dsn, None
+        if dsn is None:
+            self.ssh = psql.connect()
+
+    def close(self):
+        if self.ssh:
+            self.ssh.close()
+
+    def run(self, sql, on_notice=None):
+        """Execute a script; NOTICE lines are passed to on_notice as they arrive."""
+        if self.ssh:
+            stdout, stderr = psql.start(self.ssh, sql, "-X -F '|'")
+            errors = self._drain(iter(stderr.readline, ''), on_notice)
+            status = stdout.channel.recv_exit_status()
+            output = stdout.read().decode()
+        else:
+            proc = subprocess.Popen(['psql', self.dsn, '-X', '-v', 'ON_ERROR_STOP=1',
+                                     '-qAt', '-F', '|', '-f', '-'],
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    text=True)
+            proc.stdin.write(sql)
+            proc.stdin.close()
+            errors = self._drain(iter(proc.stderr.readline, ''), on_notice)
+            output = proc.stdout.read()
+            status = proc.wait()
+        if status != 0:
+            raise PsqlError(errors or output)
+        return output
+
+    @staticmethod
+    def _drain(lines, on_notice):
+        errors = []
+        for line in lines:
+            match = re.search(r'NOTICE:\s+(?:[0-9A-Z]{5}:\s+)?(.*)', line)
+            if match:
+                if on_notice:
+                    on_notice(match.group(1).strip())
+            else:
+                errors.append(line)
+        return ''.join(errors)
+
+    def applied(self):
+        output = self.run(f"SET client_min_messages = warning;\n{STATE_DDL}\n"
+                          f"SELECT version, checksum FROM schema_migrations ORDER BY version;")
+        return dict(line.split('|', 1) for line in output.splitlines() if '|' in line)
+
+
+def check_changed(migrations, applied):
+    changed = [m.label for m in migrations if m.version in applied and applied[m.version] != m.checksum]
+    if changed:
+        raise RuntimeError(f"applied migrations were edited: {', '.join(changed)} "
+                           f"(add a new migration instead)")
+
+
+def cmd_status(args):
+    migrations = load_migrations()
+    db = Database(args.dsn)
+    try:
+        applied = db.applied()
+    finally:
+        db.close()
+    for m in migrations:
+        if m.version not in applied:
+            state = '⏳ pending'
+        elif applied[m.version] != m.checksum:
+            state = '⚠️  changed since applied'
+        else:
+            state = '✅ applied'
+        mode = '' if m.transactional else ' (no-transaction)'
+        print(f"{m.label:<50} {state}{mode}")
+    unknown = sorted(set(applied) - {m.version for m in migrations})
+    for version in unknown:
+        print(f"{version:<50} ❓ applied but missing locally")
+
+
+def apply(db, migration, retries):
+    started = time.time()
+    for attempt in range(retries + 1):
+        try:
+            db.run(migration.script(), on_notice=lambda message: print(f"   {message}", flush=True))
+            return time.time() - started
+        except PsqlError as e:
+            if e.sqlstate not in RETRY_SQLSTATES or attempt == retries:
+                raise
+            # Back off so queued sessions behind our lock request can drain
+            delay = min(60, 2 ** attempt) + random.random()
+            print(f"   🔒 {e.sqlstate} lock timeout, retry {attempt + 1}/{retries} in {delay:.1f}s", flush=True)
+            time.sleep(delay)
+
+
+def cmd_up(args):
+    migrations = load_migrations()
+    if args.dry_run:
+        for m in migrations:
+            if not args.to or m.version <= args.to:
+                print(f"-- {m.label}\n{m.script()}")
+        return
+    db = Database(args.dsn)
+    try:
+        applied = db.applied()
+        check_changed(migrations, applied)
+        pending = [m for m in migrations if m.version not in applied and (not args.to or m.version <= args.to)]
+        if not pending:
+            print("✅ Schema is up to date")
+            return
+        for m in pending:
+            mode = 'transaction' if m.transactional else 'no-transaction'
+            print(f"⬆️  {m.label} ({mode}, lock_timeout={m.settings['lock_timeout']})", flush=True)
+            elapsed = apply(db, m, args.retries)
+            print(f"   ✅ applied in {elapsed:.1f}s")
+        print(f"\n✅ Applied {len(pending)} migration(s)")
+    finally:
+        db.close()
+
+
+def cmd_new(args):
+    slug = re.sub(r'[^\w-]+', '-', args.name.strip().lower()).strip('-')
+    os.makedirs(MIGRATIONS_DIR, exist_ok=True)
+    existing = [int(FILENAME.match(n).group(1)) for n in os.listdir(MIGRATIONS_DIR) if FILENAME.match(n)]
+    path = os.path.join(MIGRATIONS_DIR, f"{max(existing, default=0) + 1:04d}_{slug}.sql")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(TEMPLATE.format(description=args.name))
+    print(f"Created {os.path.relpath(path)}")
+
+
+def main():
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument('--dsn', help='run psql locally against this database instead of the server')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', parents=[database], help='show applied and pending migrations')
+    p = sub.add_parser('up', parents=[database], help='apply pending migrations')
+    p.add_argument('--to', help='stop after this version')
+    p.add_argument('--retries', type=int, default=5, help='retries on lock timeout (default 5)')
+    p.add_argument('--dry-run', action='store_true', help='print the generated psql scripts')
+    p = sub.add_parser('new', help='create an empty migration')
+    p.add_argument('name')
+    args = parser.parse_args()
+
+    try:
+        {'status': cmd_status, 'up': cmd_up, 'new': cmd_new}[args.command](args)
+    except (RuntimeError, ValueError) as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == '__main__':
+    main()
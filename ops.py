@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Unified ops CLI backed by a persistent SSH agent.
+
+The CLI itself imports only the standard library it needs; paramiko is
+loaded inside the background agent, which keeps a warm SSH transport to the
+server and serves requests over a Unix socket. Repeated commands therefore
+skip interpreter-heavy imports and the SSH handshake. The agent is started on
+first use and exits after AGENT_IDLE_TIMEOUT seconds without requests.
+
+Usage:
+    python ops.py run 'pm2 list'          # any remote command
+    python ops.py health                  # health-check.py checks, in parallel
+    python ops.py nginx                   # check-nginx.py checks
+    python ops.py push backend/routes/settings.js [...] [--restart]
+    python ops.py agent start|stop|status
+    python ops.py bench [-n 10]           # cold scripts vs warm CLI latency
+
+Needs AF_UNIX sockets (Linux, macOS, WSL).
+"""
+import json
+import os
+import socket
+import sys
+import time
+
+SERVER = os.environ.get('SERVER_HOST', '85.198.67.7')
+USER = os.environ.get('SERVER_USER', 'root')
+PASSWORD = os.environ.get('SERVER_PASSWORD', 'j8!RMiWztLw1')
+DOMAIN = 'ayvazyan-rekomenduet.ru'
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOCKET_PATH = os.environ.get('OPS_AGENT_SOCKET', f'/tmp/sweet-ops-{os.getuid()}.sock')
+AGENT_LOG = os.path.join(ROOT, '.ops', 'agent.log')
+AGENT_IDLE_TIMEOUT = int(os.environ.get('OPS_AGENT_IDLE', '1800'))
+REMOTE_BACKEND = '/var/www/backend'
+
+HEALTH_CHECKS = [
+    ("Nginx Status", "systemctl is-active nginx"),
+    ("PM2 Status", "pm2 list"),
+    ("PostgreSQL Status", "systemctl is-active postgresql"),
+    ("Backend Logs (last 10)", "pm2 logs backend --lines 10 --nostream"),
+    ("Disk Space", "df -h /"),
+    ("Memory", "free -m"),
+    ("API Health", "curl -s http://localhost:3000/health"),
+    ("API Professions Count", "curl -s http://localhost:3000/api/professions | python3 -c \"import sys,json; d=json.load(sys.stdin); print(f'{len(d.get(\\\"data\\\",[]))} professions')\""),
+    ("API Categories Count", "curl -s http://localhost:3000/api/categories | python3 -c \"import sys,json; d=json.load(sys.stdin); print(f'{len(d.get(\\\"data\\\",[]))} categories')\""),
+]
+NGINX_CHECKS = [
+    ("Current nginx config", "cat /etc/nginx/sites-enabled/app"),
+    ("Test internal API", "curl -s http://localhost:3000/health"),
+    ("Test HTTPS via nginx (localhost)", "curl -s https://localhost/api/health --insecure"),
+]
+
+
+# --- client -----------------------------------------------------------------
+
+def request(payload, timeout=300):
+    """Send one JSON request to the agent and return its JSON reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(SOCKET_PATH)
+        sock.sendall(json.dumps(payload).encode() + b'\n')
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    reply = json.loads(b''.join(chunks))
+    if 'error' in reply:
+        raise RuntimeError(reply['error'])
+    return reply
+
+
+def agent_running():
+    try:
+        request({'op': 'ping'}, timeout=2)
+        return True
+    except (OSError, ValueError, RuntimeError):
+        return False
+
+
+def ensure_agent():
+    if agent_running():
+        return
+    import subprocess
+    os.makedirs(os.path.dirname(AGENT_LOG), exist_ok=True)
+    with open(AGENT_LOG, 'a') as log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), 'agent', 'serve'],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if agent_running():
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f'agent did not start, see {AGENT_LOG}')
+
+
+def print_sections(results):
+    for name, result in results:
+        print(f"\n{'='*60}\n📋 {name}\n{'='*60}")
+        print(result['stdout'].strip() or result['stderr'].strip() or "(no output)")
+
+
+def cmd_run(args):
+    ensure_agent()
+    result = request({'op': 'exec', 'cmd': ' '.join(args)})
+    sys.stdout.write(result['stdout'])
+    sys.stderr.write(result['stderr'])
+    return result['status']
+
+
+def cmd_checks(checks):
+    ensure_agent()
+    reply = request({'op': 'exec_many', 'cmds': [cmd for _, cmd in checks], 'timeout': 15})
+    print_sections(zip([name for name, _ in checks], reply['results']))
+    return 0
+
+
+def cmd_push(args):
+    restart = '--restart' in args
+    paths = [arg for arg in args if arg != '--restart']
+    files = []
+    for path in paths:
+        rel = os.path.relpath(os.path.abspath(path), os.path.join(ROOT, 'backend')).replace(os.sep, '/')
+        if rel.startswith('..'):
+            raise RuntimeError(f'{path} is outside backend/')
+        files.append([os.path.abspath(path), f'{REMOTE_BACKEND}/{rel}'])
+    ensure_agent()
+    for local, remote in request({'op': 'put', 'files': files})['files']:
+        print(f"Uploaded {os.path.relpath(local, ROOT)} -> {remote}")
+    if restart:
+        print(request({'op': 'exec', 'cmd': 'pm2 reload backend --update-env'})['stdout'].strip())
+    return 0
+
+
+def cmd_agent(args):
+    action = args[0] if args else 'status'
+    if action == 'serve':
+        serve()
+    elif action == 'start':
+        ensure_agent()
+        print(f"Agent running on {SOCKET_PATH}")
+    elif action == 'stop':
+        if agent_running():
+            request({'op': 'shutdown'})
+            print("Agent stopped")
+        else:
+            print("Agent not running")
+    elif action == 'status':
+        if not agent_running():
+            print("Agent not running")
+            return 1
+        status = request({'op': 'status'})
+        print(f"Agent pid {status['pid']}, up {status['uptime']:.0f}s, {status['requests']} requests, "
+              f"transport {'active' if status['connected'] else 'idle'}")
+    else:
+        raise RuntimeError(f'unknown agent action: {action}')
+    return 0
+
+
+def cmd_bench(args):
+    """Compare a cold one-shot script with warm CLI calls through the agent."""
+    import statistics
+    import subprocess
+
+    runs = int(args[args.index('-n') + 1]) if '-n' in args else 10
+    cold_script = (
+        "import paramiko\n"
+        "ssh = paramiko.SSHClient()\n"
+        "ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())\n"
+        f"ssh.connect({SERVER!r}, username={USER!r}, password={PASSWORD!r}, timeout=30)\n"
+        "stdin, stdout, stderr = ssh.exec_command('true')\n"
+        "stdout.channel.recv_exit_status()\n"
+        "ssh.close()\n"
+    )
+    cases = [
+        ('python startup', [sys.executable, '-c', 'pass']),
+        ('cold script (import + SSH + exec)', [sys.executable, '-c', cold_script]),
+        ('warm CLI (ops.py run true)', [sys.executable, os.path.abspath(__file__), 'run', 'true']),
+    ]
+    ensure_agent()
+    print(f"⏱  {runs} runs each\n")
+    print(f"{'case':<36} {'p50 ms':>10} {'min ms':>10} {'max ms':>10}")
+    for name, command in cases:
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"{name:<36} {statistics.median(samples):>10.1f} {min(samples):>10.1f} {max(samples):>10.1f}")
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        request({'op': 'exec', 'cmd': 'true'})
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"{'agent round trip (in-process)':<36} {statistics.median(samples):>10.1f} "
+          f"{min(samples):>10.1f} {max(samples):>10.1f}")
+    return 0
+
+
+COMMANDS = {
+    'run': cmd_run,
+    'health': lambda args: cmd_checks(HEALTH_CHECKS),
+    'nginx': lambda args: cmd_checks(NGINX_CHECKS),
+    'push': cmd_push,
+    'agent': cmd_agent,
+    'bench': cmd_bench,
+}
+
+
+# --- agent ------------------------------------------------------------------
+
+def serve():
+    """Agent main loop: hold one SSH transport and serve JSON requests."""
+    import socketserver
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import paramiko
+
+    import release
+
+    state = {'client': None, 'started': time.time(), 'requests': 0, 'last': time.time()}
+    lock = threading.Lock()
+
+    def client():
+        with lock:
+            ssh = state['client']
+            if ssh is None or not ssh.get_transport() or not ssh.get_transport().is_active():
+                ssh = paramiko.SSHClient()
+                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                ssh.connect(SERVER, username=USER, password=PASSWORD, timeout=30)
+                ssh.get_transport().set_keepalive(30)
+                state['client'] = ssh
+            return ssh
+
+    def run(cmd, timeout):
+        stdin, stdout, stderr = client().exec_command(cmd, timeout=timeout)
+        status = stdout.channel.recv_exit_status()
+        return {'status': status, 'stdout': stdout.read().decode(errors='replace'),
+                'stderr': stderr.read().decode(errors='replace')}
+
+    def put(files):
+        sftp = client().open_sftp()
+        try:
+            for local, remote in files:
+                release.put_atomic(sftp, local, remote)
+        finally:
+            sftp.close()
+        return {'files': files}
+
+    def handle(payload):
+        op = payload.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'status':
+            ssh = state['client']
+            return {'pid': os.getpid(), 'uptime': time.time() - state['started'], 'requests': state['requests'],
+                    'connected': bool(ssh and ssh.get_transport() and ssh.get_transport().is_active())}
+        if op == 'exec':
+            return run(payload['cmd'], payload.get('timeout', 300))
+        if op == 'exec_many':
+            # Parallel channels multiplexed over the same transport
+            client()
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda cmd: run(cmd, payload.get('timeout', 60)), payload['cmds']))
+            return {'results': results}
+        if op == 'put':
+            return put(payload['files'])
+        if op == 'shutdown':
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return {'ok': True}
+        return {'error': f'unknown op {op!r}'}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            state['requests'] += 1
+            state['last'] = time.time()
+            try:
+                reply = handle(json.loads(self.rfile.readline()))
+            except Exception as e:
+                # Drop a broken transport so the next request reconnects
+                if isinstance(e, (paramiko.SSHException, OSError)):
+                    state['client'] = None
+                reply = {'error': f'{type(e).__name__}: {e}'}
+            self.wfile.write(json.dumps(reply).encode())
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+    old_umask = os.umask(0o077)
+    server = Server(SOCKET_PATH, Handler)
+    os.umask(old_umask)
+
+    def idle_watchdog():
+        while True:
+            time.sleep(30)
+            if time.time() - state['last'] > AGENT_IDLE_TIMEOUT:
+                server.shutdown()
+                return
+
+    threading.Thread(target=idle_watchdog, daemon=True).start()
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] agent {os.getpid()} listening on {SOCKET_PATH}", flush=True)
+    try:
+        client()
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+        if state['client']:
+            state['client'].close()
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(__doc__.strip())
+        return 2
+    try:
+        return COMMANDS[sys.argv[1]](sys.argv[2:])
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
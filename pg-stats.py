@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""pg_stat_statements snapshots with workload diffing.
+
+Takes snapshots of pg_stat_statements, pg_stat_user_tables and
+pg_stat_user_indexes over SSH/psql and stores them gzipped in
+.ops/pg-stats/. `report` diffs two snapshots: top queries by total and mean
+time, calls, rows and cache hit ratio, indexes that were never scanned and
+large tables that are read by sequential scans. Queries are matched back to the
+SQL in backend/routes/*.js by normalized token similarity.
+
+Usage:
+    python pg-stats.py install               # enable pg_stat_statements (restarts PostgreSQL)
+    python pg-stats.py snapshot
+    python pg-stats.py report                # latest vs previous snapshot
+    python pg-stats.py report --from 20261019-100000 --to 20261019-110000 [--top 15]
+    python pg-stats.py watch --interval 300  # snapshot every 5 minutes, short report each time
+    python pg-stats.py list
+"""
+import argparse
+import difflib
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+import time
+
+import psql
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.path.join(ROOT, '.ops', 'pg-stats')
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+CONF_NAME = '80-pg-stat-statements.conf'
+
+# to_jsonb(s) keeps this working across versions: PostgreSQL 13 renamed
+# total_time to total_exec_time, newer versions add columns we ignore.
+SNAPSHOT_SQL = """SET client_min_messages = warning;
+SELECT json_build_object(
+    'taken_at', extract(epoch FROM now()),
+    'server_version_num', current_setting('server_version_num')::int,
+    'database', (SELECT json_build_object('blks_hit', blks_hit, 'blks_read', blks_read, 'stats_reset', stats_reset)
+                 FROM pg_stat_database WHERE datname = current_database()),
+    'statements', COALESCE((
+        SELECT json_agg(to_jsonb(s))
+        FROM pg_stat_statements s
+        WHERE s.dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ), '[]'),
+    'tables', COALESCE((
+        SELECT json_agg(json_build_object(
+            'name', schemaname || '.' || relname, 'seq_scan', seq_scan, 'seq_tup_read', seq_tup_read,
+            'idx_scan', COALESCE(idx_scan, 0), 'live', n_live_tup, 'size', pg_relation_size(relid)))
+        FROM pg_stat_user_tables
+    ), '[]'),
+    'indexes', COALESCE((
+        SELECT json_agg(json_build_object(
+            'name', s.schemaname || '.' || s.indexrelname, 'table', s.relname, 'idx_scan', s.idx_scan,
+            'size', pg_relation_size(s.indexrelid), 'unique', i.indisunique OR i.indisprimary))
+        FROM pg_stat_user_indexes s JOIN pg_index i USING (indexrelid)
+    ), '[]')
+);"""
+
+SQL_START = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+APPENDED = re.compile(r'\+=\s*$')
+KEYWORDS = {
+    'select', 'from', 'where', 'and', 'or', 'not', 'null', 'is', 'in', 'as', 'on', 'join', 'left', 'inner',
+    'group', 'by', 'order', 'asc', 'desc', 'limit', 'offset', 'insert', 'into', 'values', 'update', 'set',
+    'delete', 'returning', 'with', 'distinct', 'count', 'case', 'when', 'then', 'else', 'end', 'like',
+    'ilike', 'true', 'false', 'now', 'filter', 'having', 'exists', 'coalesce',
+}
+JS_STRING = re.compile(r'`([^`]*)`|\'((?:[^\'\\\n]|\\.)*)\'|"((?:[^"\\\n]|\\.)*)"')
+
+
+# --- collection ---------------------------------------------------------------
+
+def remote_psql(ssh, sql):
+    status, output, errors = psql.run(ssh, sql, '-X')
+    if status != 0:
+        if 'pg_stat_statements' in errors and ('does not exist' in errors or 'must be loaded' in errors):
+            raise RuntimeError("pg_stat_statements is not enabled, run `python pg-stats.py install`")
+        raise RuntimeError(errors or output)
+    return output
+
+
+def compact(raw):
+    """Keep only the counters the report needs."""
+    statements = []
+    for row in raw['statements']:
+        if row.get('queryid') is None:
+            continue
+        statements.append({
+            'id': f"{row['userid']}:{row['queryid']}",
+            'query': row['query'],
+            'calls': row['calls'],
+            'ms': row.get('total_exec_time', row.get('total_time', 0)),
+            'rows': row['rows'],
+            'hit': row['shared_blks_hit'],
+            'read': row['shared_blks_read'],
+        })
+    return {
+        'taken_at': raw['taken_at'],
+        'server_version_num': raw['server_version_num'],
+        'database': raw['database'],
+        'statements': statements,
+        'tables': raw['tables'],
+        'indexes': raw['indexes'],
+    }
+
+
+def take_snapshot(ssh, keep):
+    snapshot = compact(json.loads(remote_psql(ssh, SNAPSHOT_SQL)))
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    name = time.strftime('%Y%m%d-%H%M%S', time.localtime(snapshot['taken_at']))
+    with gzip.open(os.path.join(SNAPSHOT_DIR, f'{name}.json.gz'), 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    for old in snapshot_names()[:-keep]:
+        os.remove(os.path.join(SNAPSHOT_DIR, f'{old}.json.gz'))
+    return name, snapshot
+
+
+def snapshot_names():
+    return sorted(os.path.basename(p)[:-len('.json.gz')] for p in glob.glob(os.path.join(SNAPSHOT_DIR, '*.json.gz')))
+
+
+def load_snapshot(name):
+    with gzip.open(os.path.join(SNAPSHOT_DIR, f'{name}.json.gz'), 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# --- diffing ------------------------------------------------------------------
+
+def delta(before, after, fields):
+    """after - before per field; a counter that went backwards means a stats reset."""
+    if before is None or any(after[f] < before[f] for f in fields):
+        return {f: after[f] for f in fields}
+    return {f: after[f] - before[f] for f in fields}
+
+
+def diff(before, after):
+    fields = ('calls', 'ms', 'rows', 'hit', 'read')
+    previous = {s['id']: s for s in before['statements']} if before else {}
+    statements = []
+    for s in after['statements']:
+        d = delta(previous.get(s['id']), s, fields)
+        if d['calls'] > 0:
+            statements.append({'id': s['id'], 'query': s['query'], **d})
+
+    fields = ('seq_scan', 'seq_tup_read', 'idx_scan')
+    previous = {t['name']: t for t in before['tables']} if before else {}
+    tables = [{**t, **delta(previous.get(t['name']), t, fields)} for t in after['tables']]
+
+    previous = {i['name']: i for i in before['indexes']} if before else {}
+    indexes = [{**i, 'total_scans': i['idx_scan'], **delta(previous.get(i['name']), i, ('idx_scan',))}
+               for i in after['indexes']]
+    return statements, tables, indexes
+
+
+# --- route mapping ------------------------------------------------------------
+
+def normalize(sql):
+    sql = re.sub(r'\$\{[^}]*\}|\$\d+', '?', sql)
+    sql = re.sub(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b", '?', sql)
+    return re.findall(r'[a-z_][a-z0-9_.]*|\?|[(),=<>*]', sql.lower())
+
+
+def relations(tokens):
+    """Names following FROM / JOIN / INTO / UPDATE, without aliases or schema."""
+    return {tokens[i + 1].split('.')[-1] for i, token in enumerate(tokens[:-1])
+            if token in ('from', 'join', 'into', 'update') and tokens[i + 1] not in KEYWORDS and tokens[i + 1] != '('}
+
+
+def names(tokens):
+    return {token for token in tokens if token[0].isalpha() and token not in KEYWORDS}
+
+
+def route_queries():
+    """(location, tokens, tables) for SQL literals in backend routes, with `query +=` parts appended."""
+    candidates = []
+    for path in sorted(glob.glob(os.path.join(BACKEND_DIR, 'routes', '*.js')) + [os.path.join(BACKEND_DIR, 'server.js')]):
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        current = None
+        for match in JS_STRING.finditer(source):
+            text = next(group for group in match.groups() if group is not None)
+            line = source.count('\n', 0, match.start()) + 1
+            location = f"{os.path.relpath(path, BACKEND_DIR).replace(os.sep, '/')}:{line}"
+            if SQL_START.match(text):
+                current = [location, text]
+                candidates.append(current)
+            elif current and APPENDED.search(source, 0, match.start()):
+                current[1] += ' ' + text
+    return [(location, tokens, relations(tokens)) for location, tokens in
+            ((location, normalize(text)) for location, text in candidates)]
+
+
+def match_route(query, routes, cache={}):
+    if query not in cache:
+        tokens = normalize(query)
+        tables = relations(tokens)
+        best, best_score = None, 0.5
+        for location, candidate, candidate_tables in routes:
+            # Statements with the same shape on different tables are not the same query
+            if tables != candidate_tables:
+                continue
+            if not tables and names(tokens) != names(candidate):
+                continue
+            score = difflib.SequenceMatcher(None, tokens, candidate, autojunk=False).ratio()
+            if score > best_score:
+                best, best_score = location, score
+        cache[query] = best
+    return cache[query]
+
+
+# --- reporting ----------------------------------------------------------------
+
+def fmt_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m {seconds}s"
+
+
+def hit_ratio(hit, read):
+    return 100 * hit / (hit + read) if hit + read else 100.0
+
+
+def one_line(query, width):
+    text = ' '.join(query.split())
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def print_statements(title, statements, total_ms, routes):
+    print(f"\n{title}")
+    print(f"   {'total ms':>10} {'%':>5} {'calls':>8} {'mean ms':>9} {'rows':>9} {'hit%':>6}  route")
+    for s in statements:
+        share = 100 * s['ms'] / total_ms if total_ms else 0
+        print(f"   {s['ms']:>10.0f} {share:>5.1f} {s['calls']:>8} {s['ms'] / s['calls']:>9.2f} "
+              f"{s['rows']:>9} {hit_ratio(s['hit'], s['read']):>6.1f}  {match_route(s['query'], routes) or '-'}")
+        print(f"      {one_line(s['query'], 100)}")
+
+
+def report(before, after, top, min_calls, min_rows, brief=False):
+    statements, tables, indexes = diff(before, after)
+    total_ms = sum(s['ms'] for s in statements)
+    calls = sum(s['calls'] for s in statements)
+    hit, read = sum(s['hit'] for s in statements), sum(s['read'] for s in statements)
+    window = (f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(before['taken_at']))} -> "
+              f"{time.strftime('%H:%M', time.localtime(after['taken_at']))} "
+              f"({fmt_duration(after['taken_at'] - before['taken_at'])})") if before else 'since stats reset'
+    print(f"📊 {window}: {calls:,} calls, {total_ms / 1000:,.1f} s DB time, "
+          f"{len(statements)} statements, hit ratio {hit_ratio(hit, read):.2f}%")
+    if not statements:
+        return
+    routes = route_queries()
+
+    by_total = sorted(statements, key=lambda s: s['ms'], reverse=True)
+    print_statements("⏱  Top by total time", by_total[:5 if brief else top], total_ms, routes)
+    if brief:
+        return
+    frequent = [s for s in statements if s['calls'] >= min_calls]
+    print_statements(f"🐢 Top by mean time (≥{min_calls} calls)",
+                     sorted(frequent, key=lambda s: s['ms'] / s['calls'], reverse=True)[:top], total_ms, routes)
+    print_statements("🔁 Top by calls", sorted(statements, key=lambda s: s['calls'], reverse=True)[:top],
+                     total_ms, routes)
+    print_statements("📦 Top by rows", sorted(statements, key=lambda s: s['rows'], reverse=True)[:top],
+                     total_ms, routes)
+    reading = [s for s in statements if s['read'] > 0]
+    print_statements("💾 Lowest cache hit ratio (disk reads)",
+                     sorted(reading, key=lambda s: (hit_ratio(s['hit'], s['read']), -s['read']))[:top],
+                     total_ms, routes)
+
+    scanned = [t for t in tables if t['seq_scan'] > 0 and t['live'] >= min_rows]
+    print(f"\n🔍 Sequential scans on tables with ≥{min_rows:,} rows")
+    if scanned:
+        print(f"   {'table':<36} {'seq scans':>10} {'rows read':>12} {'idx scans':>10} {'live rows':>10} {'seq %':>6}")
+        for t in sorted(scanned, key=lambda t: t['seq_tup_read'], reverse=True)[:top]:
+            share = 100 * t['seq_scan'] / (t['seq_scan'] + t['idx_scan'])
+            print(f"   {t['name']:<36} {t['seq_scan']:>10} {t['seq_tup_read']:>12,} {t['idx_scan']:>10} "
+                  f"{t['live']:>10,} {share:>6.1f}")
+    else:
+        print("   none")
+
+    unused = [i for i in indexes if i['idx_scan'] == 0 and not i['unique']]
+    print(f"\n🗑  Indexes not used {'in this window' if before else 'since stats reset'} "
+          f"(excluding unique/primary)")
+    if unused:
+        print(f"   {'index':<48} {'table':<24} {'size':>10} {'scans ever':>11}")
+        for i in sorted(unused, key=lambda i: i['size'], reverse=True):
+            print(f"   {i['name']:<48} {i['table']:<24} {i['size'] / 1024:>8.0f}kB {i['total_scans']:>11}")
+    else:
+        print("   none")
+
+
+# --- commands -----------------------------------------------------------------
+
+def cmd_install(args):
+    ssh = psql.connect()
+    try:
+        current = remote_psql(ssh, 'SHOW shared_preload_libraries;').strip()
+        config_file = remote_psql(ssh, 'SHOW config_file;').strip()
+        libraries = [lib.strip() for lib in current.split(',') if lib.strip()]
+        conf_dir = os.path.dirname(config_file) + '/conf.d'
+        if 'pg_stat_statements' not in libraries:
+            libraries.append('pg_stat_statements')
+            conf = (f"# Generated by pg-stats.py\n"
+                    f"shared_preload_libraries = '{','.join(libraries)}'\n"
+                    f"pg_stat_statements.max = 5000\n"
+                    f"pg_stat_statements.track = top\n"
+                    f"track_io_timing = on\n")
+            print("📦 Enabling pg_stat_statements (PostgreSQL restart)...")
+            stdin, stdout, stderr = ssh.exec_command(f'''
+mkdir -p {conf_dir}
+grep -q "^include_dir = 'conf.d'" {config_file} || echo "include_dir = 'conf.d'" >> {config_file}
+cat > {conf_dir}/{CONF_NAME} << 'EOF'
+{conf}EOF
+chown postgres:postgres {conf_dir}/{CONF_NAME}
+systemctl restart postgresql && systemctl is-active postgresql
+''', timeout=120)
+            stdout.channel.recv_exit_status()
+            print(f"   {stdout.read().decode().strip()}")
+        remote_psql(ssh, 'CREATE EXTENSION IF NOT EXISTS pg_stat_statements;')
+        print("✅ pg_stat_statements enabled")
+    finally:
+        ssh.close()
+
+
+def cmd_snapshot(args):
+    ssh = psql.connect()
+    try:
+        name, snapshot = take_snapshot(ssh, args.keep)
+    finally:
+        ssh.close()
+    print(f"📸 {name}: {len(snapshot['statements'])} statements, {len(snapshot['tables'])} tables, "
+          f"{len(snapshot['indexes'])} indexes")
+
+
+def cmd_report(args):
+    names = snapshot_names()
+    if not names:
+        raise RuntimeError("no snapshots yet, run `python pg-stats.py snapshot`")
+    to = args.to or names[-1]
+    if to not in names:
+        raise RuntimeError(f"unknown snapshot {to}")
+    since = args.since or (names[names.index(to) - 1] if names.index(to) > 0 else None)
+    if since and since not in names:
+        raise RuntimeError(f"unknown snapshot {since}")
+    report(load_snapshot(since) if since else None, load_snapshot(to), args.top, args.min_calls, args.min_rows)
+
+
+def cmd_watch(args):
+    ssh = psql.connect()
+    previous = load_snapshot(snapshot_names()[-1]) if snapshot_names() else None
+    try:
+        for number in range(args.count or sys.maxsize):
+            if number:
+                time.sleep(args.interval)
+            name, snapshot = take_snapshot(ssh, args.keep)
+            print(f"\n{'=' * 100}\n📸 {name}")
+            if previous:
+                report(previous, snapshot, args.top, args.min_calls, args.min_rows, brief=True)
+            previous = snapshot
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ssh.close()
+
+
+def cmd_list(args):
+    for name in snapshot_names():
+        path = os.path.join(SNAPSHOT_DIR, f'{name}.json.gz')
+        print(f"{name}  {os.path.getsize(path) / 1024:>8.1f} kB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('install', help='enable pg_stat_statements on the server')
+    p = sub.add_parser('snapshot', help='store a snapshot in .ops/pg-stats')
+    p.add_argument('--keep', type=int, default=500, help='snapshots to retain (default 500)')
+    p = sub.add_parser('report', help='diff two snapshots')
+    p.add_argument('--from', dest='since', help='older snapshot (default: the one before --to)')
+    p.add_argument('--to', help='newer snapshot (default: latest)')
+    p = sub.add_parser('watch', help='snapshot periodically with a short report')
+    p.add_argument('--interval', type=int, default=300, help='seconds between snapshots (default 300)')
+    p.add_argument('--count', type=int, default=0, help='stop after N snapshots (default: run until ^C)')
+    p.add_argument('--keep', type=int, default=500)
+    sub.add_parser('list', help='list stored snapshots')
+    for name in ('report', 'watch'):
+        p = sub.choices[name]
+        p.add_argument('--top', type=int, default=10, help='rows per section (default 10)')
+        p.add_argument('--min-calls', type=int, default=5, help='minimum calls for the mean-time ranking')
+        p.add_argument('--min-rows', type=int, default=1000, help='ignore seq scans on smaller tables')
+    args = parser.parse_args()
+
+    try:
+        {'install': cmd_install, 'snapshot': cmd_snapshot, 'report': cmd_report,
+         'watch': cmd_watch, 'list': cmd_list}[args.command](args)
+    except RuntimeError as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""psql on the server over SSH, shared by the database scripts.
+
+Scripts are fed to psql on stdin, so nothing is written to the server's /tmp
+and concurrent runs (the deploy workflow and a manual one) cannot clobber each
+other's SQL.
+"""
+DB_NAME = 'sweet_style_saver'
+
+
+def connect():
+    # release imports paramiko; keep it out of local-only commands (--dry-run, --dsn)
+    import release
+    return release.connect()
+
+
+def start(ssh, sql, options='', timeout=None):
+    """Start psql on `sql`; returns the (stdout, stderr) channel files."""
+    cmd = f"sudo -u postgres psql -d {DB_NAME} -v ON_ERROR_STOP=1 -qAt {options} -f -"
+    stdin, stdout, stderr = ssh.exec_command(cmd, timeout=timeout)
+    stdin.write(sql.encode('utf-8'))
+    stdin.flush()
+    stdin.channel.shutdown_write()
+    return stdout, stderr
+
+
+def run(ssh, sql, options='', timeout=120):
+    """Run a psql script; returns (exit status, stdout, stderr)."""
+    stdout, stderr = start(ssh, sql, options, timeout)
+    # Read before waiting: psql blocks once its output fills the channel window
+    output, errors = stdout.read().decode(), stderr.read().decode()
+    return stdout.channel.recv_exit_status(), output, errors
@@ -1,15 +1,8 @@
 #!/usr/bin/env python3
 """Quick deploy of specific backend files"""
-import paramiko
-from scp import SCPClient
+import release
 
-SERVER = '85.198.67.7'
-USER = 'root'
-PASSWORD = 'j8!RMiWztLw1'
-
-ssh = paramiko.SSHClient()
-ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-ssh.connect(SERVER, username=USER, password=PASSWORD, timeout=30)
+ssh = release.connect()
 
 files = [
     ('backend/routes/professions.js', '/var/www/backend/routes/professions.js'),
@@ -17,10 +10,11 @@ files = [
     ('backend/routes/card-templates.js', '/var/www/backend/routes/card-templates.js'),
 ]
 
-with SCPClient(ssh.get_transport()) as scp:
-    for local, remote in files:
-        print(f"Uploading {local}...")
-        scp.put(local, remote)
+sftp = ssh.open_sftp()
+for local, remote in files:
+    print(f"Uploading {local}...")
+    release.put_atomic(sftp, local, remote)
+sftp.close()
 
 print("Restarting PM2...")
 stdin, stdout, stderr = ssh.exec_command('pm2 restart backend')
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""Versioned releases with hardlink deduplication and instant rollback.
+
+Server layout:
+    /var/www/releases/frontend/<id>/   frontend builds (dist contents)
+    /var/www/releases/backend/<id>/    backend sources + node_modules
+    /var/www/shared/backend/           .env and uploads/, shared by releases
+    /var/www/app/dist  -> current frontend release (symlink)
+    /var/www/backend   -> current backend release (symlink)
+
+A new release starts as `cp -al` of the current one (every file hardlinked),
+then only the delta against the current release manifest is applied: changed
+and new files are shipped in one tar.gz, removed files are unlinked. Upload
+volume and disk use therefore scale with the size of the change.
+
+Usage:
+    python release.py deploy frontend|backend
+    python release.py rollback frontend|backend [release_id] [--expect live_id]
+    python release.py list [frontend|backend]
+    python release.py cleanup [frontend|backend] [--keep N]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import posixpath
+import subprocess
+import sys
+import tarfile
+import time
+
+import paramiko
+
+SERVER = os.environ.get('SERVER_HOST', '85.198.67.7')
+USER = os.environ.get('SERVER_USER', 'root')
+PASSWORD = os.environ.get('SERVER_PASSWORD', 'j8!RMiWztLw1')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RELEASES_ROOT = '/var/www/releases'
+SHARED_BACKEND = '/var/www/shared/backend'
+MANIFEST = '.release-manifest.json'
+KEEP_RELEASES = int(os.environ.get('KEEP_RELEASES', '5'))
+# target.json per switch made by `deploy`, read by smoke-gate.py --rollback
+SWITCH_DIR = os.path.join(ROOT, '.ops', 'releases')
+
+TARGETS = {
+    'frontend': {
+        'local': os.path.join(ROOT, 'dist'),
+        'link': '/var/www/app/dist',
+        # Vite manifest and hidden sourcemaps are read locally by warm-cache.py /
+        # bundle-size.py and are not published
+        'exclude': {'.vite'},
+        'exclude_suffixes': ('.map',),
+    },
+    'backend': {
+        'local': os.path.join(ROOT, 'backend'),
+        'link': '/var/www/backend',
+        # Runtime state lives in SHARED_BACKEND and is symlinked into releases
+        'exclude': {'node_modules', 'uploads', '.env', '.env.example', '.gitignore'},
+    },
+}
+SHARED_ENTRIES = ['.env', 'uploads']
+DEPENDENCY_FILES = {'package.json', 'package-lock.json'}
+
+
+def connect():
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(SERVER, username=USER, password=PASSWORD, timeout=30)
+    return ssh
+
+
+def run(ssh, cmd, timeout=120, check=True):
+    stdin, stdout, stderr = ssh.exec_command(cmd, timeout=timeout)
+    status = stdout.channel.recv_exit_status()
+    output = stdout.read().decode()
+    errors = stderr.read().decode()
+    if check and status != 0:
+        raise RuntimeError(f"Remote command failed ({status}): {cmd.strip()}\n{errors or output}")
+    return output
+
+
+def put_atomic(sftp, local, remote):
+    """Upload next to `remote` and rename over it.
+
+    Files in a release are hardlinks shared with older releases, so writing
+    through the live symlink would change every rollback target as well. When
+    `remote` is inside a live release, its manifest entry is updated too, so
+    the next `deploy` diffs against what is really on the server.
+    """
+    sftp.put(local, remote + '.tmp')
+    sftp.posix_rename(remote + '.tmp', remote)
+    for spec in TARGETS.values():
+        if not remote.startswith(spec['link'] + '/'):
+            continue
+        path = f"{spec['link']}/{MANIFEST}"
+        try:
+            with sftp.open(path) as f:
+                manifest = json.loads(f.read())
+        except IOError:
+            return  # adopted release without a manifest: deploy hashes the server copy
+        manifest['files'][remote[len(spec['link']) + 1:]] = [file_digest(local), os.path.getsize(local)]
+        sftp.putfo(io.BytesIO(json.dumps(manifest).encode()), path + '.tmp')
+        sftp.posix_rename(path + '.tmp', path)
+        return
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_manifest(target):
+    """Map relative path -> [sha256, size] for every file that ships."""
+    base = TARGETS[target]['local']
+    exclude = TARGETS[target]['exclude']
+    exclude_suffixes = TARGETS[target].get('exclude_suffixes', ())
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(base):
+        if dirpath == base:
+            dirnames[:] = [d for d in dirnames if d not in exclude]
+            filenames = [f for f in filenames if f not in exclude]
+        for filename in filenames:
+            if exclude_suffixes and filename.endswith(exclude_suffixes):
+                continue
+            full = os.path.join(dirpath, filename)
+            rel = os.path.relpath(full, base).replace(os.sep, '/')
+            files[rel] = [file_digest(full), os.path.getsize(full)]
+    return files
+
+
+def releases_dir(target):
+    return f'{RELEASES_ROOT}/{target}'
+
+
+def list_releases(ssh, target):
+    output = run(ssh, f'ls -1 {releases_dir(target)} 2>/dev/null', check=False)
+    return sorted(line for line in output.split() if not line.endswith('.tmp'))
+
+
+def current_release(ssh, target):
+    link = TARGETS[target]['link']
+    output = run(ssh, f'readlink {link}', check=False).strip()
+    return posixpath.basename(output) if output.startswith(releases_dir(target)) else None
+
+
+def adopt_existing(ssh, target):
+    """Turn an in-place deploy directory into the first release.
+
+    Returns None on a fresh server, where there is nothing to adopt: the first
+    release is then built from scratch and goes live through `activate`.
+    """
+    link = TARGETS[target]['link']
+    kind = run(ssh, f'if [ -L {link} ]; then echo symlink; elif [ -d {link} ]; then echo dir; '
+                    f'elif [ -e {link} ]; then echo other; else echo missing; fi').strip()
+    if kind == 'missing':
+        run(ssh, f'mkdir -p {releases_dir(target)} {posixpath.dirname(link)}')
+        return None
+    if kind != 'dir':
+        raise RuntimeError(f"{link} is a {kind} outside {releases_dir(target)}; move it aside and deploy again")
+
+    initial = f'{releases_dir(target)}/00000000-000000-initial'
+    print(f"  Converting {link} into release {posixpath.basename(initial)}...")
+    cmd = f'mkdir -p {releases_dir(target)}\n'
+    if target == 'backend':
+        cmd += f'mkdir -p {SHARED_BACKEND}/uploads\n'
+        cmd += f'[ -f {link}/.env ] && [ ! -e {SHARED_BACKEND}/.env ] && mv {link}/.env {SHARED_BACKEND}/.env\n'
+        cmd += f'[ -d {link}/uploads ] && cp -a {link}/uploads/. {SHARED_BACKEND}/uploads/ && rm -rf {link}/uploads\n'
+    cmd += f'mv {link} {initial} && ln -sfn {initial} {link}\n'
+    run(ssh, cmd)
+    if target == 'backend':
+        link_shared(ssh, initial)
+        register_pm2(ssh)
+    return posixpath.basename(initial)
+
+
+def register_pm2(ssh):
+    """(Re)register the backend against the symlinked path so reloads follow the switch."""
+    link = TARGETS['backend']['link']
+    run(ssh, f'''
+pm2 delete backend >/dev/null 2>&1 || true
+pm2 start {link}/server.js --name backend --cwd {link}
+pm2 save
+''', timeout=60)
+
+
+def link_shared(ssh, release_path):
+    cmds = [f'mkdir -p {SHARED_BACKEND}/uploads', f'touch {SHARED_BACKEND}/.env']
+    for entry in SHARED_ENTRIES:
+        cmds.append(f'rm -rf {release_path}/{entry} && ln -s {SHARED_BACKEND}/{entry} {release_path}/{entry}')
+    run(ssh, '\n'.join(cmds))
+
+
+def remote_manifest(ssh, target, release):
+    """Load the release manifest, hashing files on the server if it is missing."""
+    path = f'{releases_dir(target)}/{release}'
+    output = run(ssh, f'cat {path}/{MANIFEST} 2>/dev/null', check=False)
+    if output.strip():
+        return json.loads(output)['files']
+    print("  No manifest on server, hashing current release...")
+    output = run(ssh, f'''cd {path} && find . -path ./node_modules -prune -o -type f ! -name {MANIFEST} -printf '%s %p\\n' | while read size file; do
+  echo "$size $(sha256sum "$file")"
+done''', timeout=300)
+    files = {}
+    for line in output.splitlines():
+        size, digest, rel = line.split(None, 2)
+        files[rel[2:]] = [digest, int(size)]
+    return files
+
+
+def build_delta(local, remote):
+    changed = sorted(rel for rel, (digest, _) in local.items() if remote.get(rel, [None])[0] != digest)
+    removed = sorted(rel for rel in remote if rel not in local)
+    return changed, removed
+
+
+def pack(target, paths):
+    base = TARGETS[target]['local']
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+        for rel in paths:
+            tar.add(os.path.join(base, rel), arcname=rel, recursive=False)
+    buf.seek(0)
+    return buf
+
+
+def release_id():
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = 'local'
+    return f'{stamp}-{rev}'
+
+
+def activate(ssh, target, release, first=False):
+    """Atomically point the live symlink at a release and restart if needed."""
+    switch_link(ssh, target, release)
+    restart(ssh, target, first)
+
+
+def switch_link(ssh, target, release):
+    link = TARGETS[target]['link']
+    path = f'{releases_dir(target)}/{release}'
+    run(ssh, f'ln -sfn {path} {link}.tmp && mv -Tf {link}.tmp {link}')
+
+
+def restart(ssh, target, first=False):
+    if target == 'backend':
+        if first:
+            print("  Registering backend in PM2...")
+            register_pm2(ssh)
+        else:
+            print("  Reloading PM2...")
+            run(ssh, 'pm2 reload backend --update-env', timeout=60)
+
+
+def record_switch(target, previous=None, new=None):
+    """Remember which release `deploy` replaced, or forget it when nothing was switched."""
+    path = os.path.join(SWITCH_DIR, f'{target}.json')
+    if previous is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(SWITCH_DIR, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'target': target, 'previous': previous, 'release': new, 'switched': time.time()}, f)
+
+
+def deploy(ssh, target):
+    if not os.path.isdir(TARGETS[target]['local']):
+        sys.exit(f"{TARGETS[target]['local']} not found (run `python build-cache.py` first)")
+
+    print(f"\n🚀 Deploying {target}")
+    started = time.time()
+    record_switch(target)
+    local = local_manifest(target)
+
+    current = current_release(ssh, target) or adopt_existing(ssh, target)
+    remote = remote_manifest(ssh, target, current) if current else {}
+    changed, removed = build_delta(local, remote)
+    upload_bytes = sum(local[rel][1] for rel in changed)
+    print(f"  Base release: {current or 'none, first release'}")
+    print(f"  {len(changed)} changed/new, {len(removed)} removed, "
+          f"{len(local) - len(changed)} reused via hardlinks")
+
+    if not changed and not removed:
+        print("  Nothing to deploy, current release is up to date")
+        return
+
+    new = release_id()
+    new_path = f'{releases_dir(target)}/{new}'
+    tmp_path = new_path + '.tmp'
+    if current:
+        run(ssh, f'rm -rf {tmp_path} && cp -al {releases_dir(target)}/{current} {tmp_path}', timeout=300)
+    else:
+        run(ssh, f'rm -rf {tmp_path} && mkdir -p {tmp_path}')
+
+    sftp = ssh.open_sftp()
+    try:
+        # Unlink before extracting so hardlinks shared with older releases stay intact
+        doomed = changed + removed
+        sftp.putfo(io.BytesIO('\n'.join(doomed).encode()), f'{tmp_path}/.release-delete')
+        run(ssh, f'''cd {tmp_path}
+xargs -r -d '\\n' rm -f -- < .release-delete
+rm -f .release-delete {MANIFEST}
+find . -mindepth 1 -type d -empty -not -path './node_modules*' -delete
+''')
+        if changed:
+            archive = pack(target, changed)
+            print(f"  Uploading delta ({upload_bytes / 1024:.1f} KB raw, "
+                  f"{len(archive.getbuffer()) / 1024:.1f} KB compressed)...")
+            sftp.putfo(archive, f'{tmp_path}/.release-delta.tar.gz')
+            run(ssh, f'cd {tmp_path} && tar -xzf .release-delta.tar.gz --no-same-owner && rm -f .release-delta.tar.gz')
+        manifest = {'release': new, 'base': current, 'created': time.time(), 'files': local}
+        sftp.putfo(io.BytesIO(json.dumps(manifest).encode()), f'{tmp_path}/{MANIFEST}')
+    finally:
+        sftp.close()
+
+    if target == 'backend':
+        link_shared(ssh, tmp_path)
+        if DEPENDENCY_FILES & set(changed):
+            # npm may rewrite files in place, so never let it touch shared inodes
+            print("  Dependencies changed, reinstalling node_modules...")
+            run(ssh, f'cd {tmp_path} && rm -rf node_modules && npm install --production 2>&1 | tail -5', timeout=600)
+
+    run(ssh, f'mv {tmp_path} {new_path}')
+    switch_link(ssh, target, new)
+    # Record before restarting: if pm2 fails, smoke-gate.py must still undo the switch
+    record_switch(target, current, new)
+    restart(ssh, target, first=current is None)
+    print(f"  ✅ {target} release {new} live in {time.time() - started:.1f}s")
+    cleanup(ssh, target, KEEP_RELEASES)
+
+
+def rollback(ssh, target, release=None, expect=None):
+    releases = list_releases(ssh, target)
+    current = current_release(ssh, target)
+    if expect and current != expect:
+        sys.exit(f"{target} is at {current}, not {expect}; not rolling back")
+    if release is None:
+        older = [r for r in releases if current is None or r < current]
+        if not older:
+            sys.exit(f"No release older than {current} to roll back to")
+        release = older[-1]
+    elif release not in releases:
+        sys.exit(f"Unknown {target} release: {release}")
+    print(f"\n⏪ Rolling back {target}: {current} -> {release}")
+    activate(ssh, target, release)
+    print("  ✅ Done")
+
+
+def cleanup(ssh, target, keep):
+    releases = list_releases(ssh, target)
+    current = current_release(ssh, target)
+    doomed = [r for r in releases[:-keep] if r != current] if keep > 0 else []
+    for release in doomed:
+        print(f"  🗑  Removing old {target} release {release}")
+        run(ssh, f'rm -rf {releases_dir(target)}/{release}', timeout=300)
+
+
+def show(ssh, target):
+    releases = list_releases(ssh, target)
+    current = current_release(ssh, target)
+    print(f"\n{target} releases ({len(releases)}):")
+    if not releases:
+        return
+    # du counts each hardlinked inode once, so later releases show their delta only
+    paths = ' '.join(f'{releases_dir(target)}/{r}' for r in releases)
+    usage = {}
+    for line in run(ssh, f'du -sk {paths}', timeout=120, check=False).splitlines():
+        size, path = line.split(None, 1)
+        usage[posixpath.basename(path)] = int(size)
+    for release in releases:
+        marker = '*' if release == current else ' '
+        print(f"  {marker} {release}  +{usage.get(release, 0) / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('deploy')
+    p.add_argument('target', choices=TARGETS)
+    p = sub.add_parser('rollback')
+    p.add_argument('target', choices=TARGETS)
+    p.add_argument('release', nargs='?')
+    p.add_argument('--expect', help='only roll back while this release is live')
+    p = sub.add_parser('list')
+    p.add_argument('target', nargs='?', choices=TARGETS)
+    p = sub.add_parser('cleanup')
+    p.add_argument('target', nargs='?', choices=TARGETS)
+    p.add_argument('--keep', type=int, default=KEEP_RELEASES)
+    args = parser.parse_args()
+
+    ssh = connect()
+    try:
+        if args.command == 'deploy':
+            deploy(ssh, args.target)
+        elif args.command == 'rollback':
+            rollback(ssh, args.target, args.release, args.expect)
+        elif args.command == 'list':
+            for target in [args.target] if args.target else TARGETS:
+                show(ssh, target)
+        elif args.command == 'cleanup':
+            for target in [args.target] if args.target else TARGETS:
+                cleanup(ssh, target, args.keep)
+    finally:
+        ssh.close()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (paramiko.SSHException, RuntimeError) as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
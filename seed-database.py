@@ -1,139 +1,167 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Проверка и наполнение базы данных начальными данными
-"""
+Синхронизация справочных данных из backend/db/fixtures/*.csv
 
-import paramiko
+Каждая таблица загружается через COPY во временную таблицу, после чего одним
+set-based запросом выполняется upsert изменившихся строк и отключение
+(is_active = false) строк, которые были в прошлой версии фикстуры, но исчезли
+из текущей. Всё — в одной транзакции. Дайджест фикстуры хранится в fixture_sync, поэтому неизменённые
+таблицы не отправляются на сервер: скрипт можно запускать на каждом деплое.
 
-SERVER = '85.198.67.7'
-USER = 'root'
-PASSWORD = 'j8!RMiWztLw1'
+    python seed-database.py            # синхронизировать изменившиеся фикстуры
+    python seed-database.py --force    # отправить все фикстуры
+    python seed-database.py --dry-run  # показать SQL без выполнения
+"""
 
-print("\n" + "="*70)
-print("🔍 ПРОВЕРКА И НАПОЛНЕНИЕ БАЗЫ ДАННЫХ")
-print("="*70)
+import argparse
+import csv
+import hashlib
+import io
+import os
+import sys
+
+import psql
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'db', 'fixtures')
+
+# В порядке внешних ключей. key — колонка для ON CONFLICT;
+# update — обновляемые колонки (None = все, кроме ключа и id);
+# prune — отключать (is_active = false) строки, убранные из фикстуры. Не удалять:
+# DELETE категории каскадом сносит её связи с партнёрами и заявками.
+TABLES = [
+    {'table': 'categories', 'key': 'id', 'update': None, 'prune': True},
+    {'table': 'professions', 'key': 'id', 'update': None, 'prune': True},
+    {'table': 'card_templates', 'key': 'id', 'update': None, 'prune': True},
+    # Значения настроек редактируются в админке — из фикстуры берём только описание
+    {'table': 'settings', 'key': 'key', 'update': ['description'], 'prune': False},
+]
+
+STATE_DDL = """CREATE TABLE IF NOT EXISTS fixture_sync (
+    table_name text PRIMARY KEY,
+    digest text NOT NULL,
+    keys text[] NOT NULL DEFAULT '{}',
+    synced_at timestamp with time zone DEFAULT now()
+);"""
+
+
+def load_fixture(spec):
+    path = os.path.join(FIXTURES_DIR, f"{spec['table']}.csv")
+    with open(path, 'rb') as f:
+        raw = f.read()
+    text = raw.decode('utf-8-sig')
+    columns = next(csv.reader(io.StringIO(text)))
+    if spec['key'] not in columns:
+        raise ValueError(f"{path}: нет ключевой колонки {spec['key']}")
+    return {
+        'columns': columns,
+        'data': text.rstrip('\n') + '\n',
+        'digest': hashlib.sha256(raw).hexdigest(),
+    }
+
+
+def sync_sql(spec, fixture):
+    """SQL для одной таблицы: COPY во временную таблицу + upsert/отключение одним запросом."""
+    table, key = spec['table'], spec['key']
+    tmp = f'fx_{table}'
+    columns = fixture['columns']
+    column_list = ', '.join(columns)
+    update = spec['update'] or [c for c in columns if c not in (key, 'id')]
+    set_clause = ', '.join(f'{c} = EXCLUDED.{c}' for c in update)
+    changed = (f"({', '.join(f't.{c}' for c in update)}) IS DISTINCT FROM "
+               f"({', '.join(f'EXCLUDED.{c}' for c in update)})")
+    if spec['prune']:
+        retired = f"""UPDATE {table} t SET is_active = false
+    FROM fixture_sync s
+    WHERE s.table_name = '{table}' AND t.{key}::text = ANY(s.keys) AND t.is_active
+      AND NOT EXISTS (SELECT 1 FROM {tmp} f WHERE f.{key} = t.{key})
+    RETURNING 1"""
+    else:
+        retired = 'SELECT 1 WHERE false'
+    return f"""
+CREATE TEMP TABLE {tmp} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP;
+COPY {tmp} ({column_list}) FROM STDIN WITH (FORMAT csv, HEADER true);
+{fixture['data']}\\.
+WITH upserted AS (
+    INSERT INTO {table} AS t ({column_list})
+    SELECT {column_list} FROM {tmp}
+    ON CONFLICT ({key}) DO UPDATE SET {set_clause}
+    WHERE {changed}
+    RETURNING (xmax = 0) AS inserted
+), retired AS (
+    {retired}
+), state AS (
+    INSERT INTO fixture_sync (table_name, digest, keys, synced_at)
+    SELECT '{table}', '{fixture['digest']}', COALESCE(array_agg({key}::text), '{{}}'), now() FROM {tmp}
+    ON CONFLICT (table_name) DO UPDATE
+    SET digest = EXCLUDED.digest, keys = EXCLUDED.keys, synced_at = EXCLUDED.synced_at
+    RETURNING 1
+)
+SELECT '{table}',
+       (SELECT count(*) FROM upserted WHERE inserted),
+       (SELECT count(*) FROM upserted WHERE NOT inserted),
+       (SELECT count(*) FROM retired);
+"""
 
-try:
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    print("\n🔌 Подключение к серверу...")
-    ssh.connect(SERVER, username=USER, password=PASSWORD, timeout=30)
-    print("   ✅ Подключено")
 
-    # 1. Проверка текущего состояния базы
-    print("\n1️⃣  Проверка таблиц в базе...")
-    commands = """
-sudo -u postgres psql -d sweet_style_saver -c "
-SELECT table_name FROM information_schema.tables 
-WHERE table_schema = 'public' 
-ORDER BY table_name;
-"
-"""
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=30)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    print(output)
-
-    # 2. Проверка данных в professions
-    print("\n2️⃣  Проверка данных в professions...")
-    commands = """
-sudo -u postgres psql -d sweet_style_saver -c "SELECT COUNT(*) FROM professions;"
-"""
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=30)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    print(output)
-
-    # 3. Добавление начальных данных
-    print("\n3️⃣  Добавление начальных данных...")
-    commands = """
-sudo -u postgres psql -d sweet_style_saver << 'EOF'
-
--- Категории
-INSERT INTO categories (id, name, description, icon, sort_order, is_active) VALUES
-('22222222-2222-2222-2222-222222222201', 'Недвижимость', 'Услуги в сфере недвижимости', 'building', 1, true),
-('22222222-2222-2222-2222-222222222202', 'Страхование', 'Страховые услуги', 'shield', 2, true),
-('22222222-2222-2222-2222-222222222203', 'Юридические услуги', 'Юридическая помощь', 'scale', 3, true),
-('22222222-2222-2222-2222-222222222204', 'Финансы', 'Финансовые услуги', 'wallet', 4, true),
-('22222222-2222-2222-2222-222222222205', 'Ипотека', 'Ипотечное кредитование', 'home', 5, true),
-('22222222-2222-2222-2222-222222222206', 'Оценка', 'Оценка имущества', 'clipboard', 6, true)
-ON CONFLICT (id) DO NOTHING;
-
--- Профессии (с привязкой к категориям)
-INSERT INTO professions (id, name, category_id, sort_order, is_active) VALUES
-('11111111-1111-1111-1111-111111111101', 'Риэлтор', '22222222-2222-2222-2222-222222222201', 1, true),
-('11111111-1111-1111-1111-111111111102', 'Страховой агент', '22222222-2222-2222-2222-222222222202', 2, true),
-('11111111-1111-1111-1111-111111111103', 'Юрист', '22222222-2222-2222-2222-222222222203', 3, true),
-('11111111-1111-1111-1111-111111111104', 'Бухгалтер', '22222222-2222-2222-2222-222222222204', 4, true),
-('11111111-1111-1111-1111-111111111105', 'Финансовый консультант', '22222222-2222-2222-2222-222222222204', 5, true),
-('11111111-1111-1111-1111-111111111106', 'Нотариус', '22222222-2222-2222-2222-222222222203', 6, true),
-('11111111-1111-1111-1111-111111111107', 'Ипотечный брокер', '22222222-2222-2222-2222-222222222205', 7, true),
-('11111111-1111-1111-1111-111111111108', 'Оценщик', '22222222-2222-2222-2222-222222222206', 8, true)
-ON CONFLICT (id) DO NOTHING;
-
--- Шаблоны карточек
-INSERT INTO card_templates (id, name, image_url, description, sort_order, is_active) VALUES
-('33333333-3333-3333-3333-333333333301', 'Классический', '/templates/classic.png', 'Классический дизайн визитки', 1, true),
-('33333333-3333-3333-3333-333333333302', 'Современный', '/templates/modern.png', 'Современный минималистичный стиль', 2, true),
-('33333333-3333-3333-3333-333333333303', 'Минимализм', '/templates/minimalist.png', 'Простой и элегантный', 3, true)
-ON CONFLICT (id) DO NOTHING;
-
--- Настройки приложения
-INSERT INTO settings (id, key, value, description) VALUES
-('44444444-4444-4444-4444-444444444401', 'site_name', 'Айвазян Рекомендует', 'Название сайта'),
-('44444444-4444-4444-4444-444444444402', 'admin_email', 'admin@ayvazyan-rekomenduet.ru', 'Email администратора'),
-('44444444-4444-4444-4444-444444444403', 'telegram_channel', '@av_rekomenduet', 'Telegram канал'),
-('44444444-4444-4444-4444-444444444404', 'max_photos', '5', 'Максимум фото для партнера')
-ON CONFLICT (key) DO NOTHING;
-
-EOF
-"""
-    
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=60)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    errors = stderr.read().decode()
-    print(output)
-    if errors:
-        print(f"Stderr: {errors}")
-
-    # 4. Проверка данных после вставки
-    print("\n4️⃣  Проверка данных после вставки...")
-    commands = """
-sudo -u postgres psql -d sweet_style_saver -c "
-SELECT 'professions' as table_name, COUNT(*) as count FROM professions
-UNION ALL
-SELECT 'categories', COUNT(*) FROM categories
-UNION ALL
-SELECT 'card_templates', COUNT(*) FROM card_templates
-UNION ALL
-SELECT 'app_settings', COUNT(*) FROM app_settings;
-"
-"""
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=30)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    print(output)
-
-    # 5. Тест API
-    print("\n5️⃣  Тест API после наполнения данных...")
-    commands = """
-curl -s http://localhost:3000/api/professions | python3 -c "import sys, json; data=json.load(sys.stdin); print(f'Professions: {len(data.get(\"data\", []))} записей')"
-curl -s http://localhost:3000/api/categories | python3 -c "import sys, json; data=json.load(sys.stdin); print(f'Categories: {len(data.get(\"data\", []))} записей')"
-"""
-    stdin, stdout, stderr = ssh.exec_command(commands, timeout=30)
-    stdout.channel.recv_exit_status()
-    output = stdout.read().decode()
-    print(output)
+def main():
+    parser = argparse.ArgumentParser(description='Синхронизация справочных данных')
+    parser.add_argument('--force', action='store_true', help='синхронизировать все таблицы')
+    parser.add_argument('--dry-run', action='store_true', help='только вывести SQL')
+    args = parser.parse_args()
+
+    fixtures = {spec['table']: load_fixture(spec) for spec in TABLES}
 
-    ssh.close()
+    if args.dry_run:
+        print(STATE_DDL)
+        for spec in TABLES:
+            print(sync_sql(spec, fixtures[spec['table']]))
+        return
 
     print("\n" + "="*70)
-    print("✅ ПРОВЕРКА ЗАВЕРШЕНА!")
-    print("="*70 + "\n")
+    print("🔄 СИНХРОНИЗАЦИЯ СПРАВОЧНЫХ ДАННЫХ")
+    print("="*70)
+
+    print("\n🔌 Подключение к серверу...")
+    ssh = psql.connect()
+    print("   ✅ Подключено")
 
-except paramiko.SSHException as e:
-    print(f"\n❌ Ошибка SSH: {e}")
-except Exception as e:
-    print(f"\n❌ Ошибка: {e}")
+    try:
+        status, output, errors = psql.run(ssh, STATE_DDL + "\nSELECT table_name, digest FROM fixture_sync;",
+                                           "-F '|'", timeout=60)
+        if status != 0:
+            raise RuntimeError(errors)
+        synced = dict(line.split('|', 1) for line in output.splitlines() if '|' in line)
+
+        pending = [spec for spec in TABLES
+                   if args.force or synced.get(spec['table']) != fixtures[spec['table']]['digest']]
+        for spec in TABLES:
+            if spec not in pending:
+                print(f"   ⏭  {spec['table']}: без изменений")
+        if not pending:
+            print("\n✅ Все фикстуры актуальны")
+            return
+
+        script = 'BEGIN;\n' + ''.join(sync_sql(spec, fixtures[spec['table']]) for spec in pending) + 'COMMIT;\n'
+        print(f"\n📤 Синхронизация: {', '.join(spec['table'] for spec in pending)}...")
+        status, output, errors = psql.run(ssh, script, "-F '|'", timeout=60)
+        if status != 0:
+            raise RuntimeError(f"транзакция откатена\n{errors}")
+
+        print(f"\n   {'таблица':<18} {'добавлено':>10} {'обновлено':>10} {'отключено':>10}")
+        for line in output.splitlines():
+            parts = line.split('|')
+            if len(parts) == 4:
+                table, inserted, updated, retired = parts
+                print(f"   {table:<18} {inserted:>10} {updated:>10} {retired:>10}")
+        print("\n✅ СИНХРОНИЗАЦИЯ ЗАВЕРШЕНА")
+    finally:
+        ssh.close()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        print(f"\n❌ Ошибка: {e}")
+        sys.exit(1)
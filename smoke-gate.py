@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Post-deploy smoke test and performance regression gate.
+
+Hits the endpoint matrix below from the deploy machine in parallel (each worker
+keeps one keep-alive HTTPS connection), validates status and response shape,
+and compares median latency and payload size with the baseline stored for the
+previous release. Exits 1 on any failure or regression and can trigger
+`release.py rollback` on the way out. Only targets that `release.py deploy`
+actually switched are rolled back, to the release that was live before.
+
+Usage:
+    python smoke-gate.py                        # check, compare, save baseline on pass
+    python smoke-gate.py --rollback backend     # roll back backend on failure
+    python smoke-gate.py --rollback backend,frontend --threshold 0.3
+    python smoke-gate.py --base-url https://localhost:8443 --insecure --no-save
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import re
+import ssl
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import keepalive
+
+DOMAIN = 'ayvazyan-rekomenduet.ru'
+BASE_URL = f'https://{DOMAIN}'
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(ROOT, '.ops', 'smoke')
+# Written by `release.py deploy` for every target it switched in this deploy
+SWITCH_DIR = os.path.join(ROOT, '.ops', 'releases')
+TIMEOUT = 15
+
+# name -> path and expectations. `json` maps top-level keys to the expected type.
+ENDPOINTS = {
+    'index': {'path': '/', 'contains': '<div id="root">'},
+    'health': {'path': '/health', 'json': {'status': str}},
+    'categories': {'path': '/api/categories', 'json': {'data': list}},
+    'categories-active': {'path': '/api/categories?is_active=true', 'json': {'data': list}},
+    'professions': {'path': '/api/professions', 'json': {'data': list}},
+    'card-templates': {'path': '/api/card-templates', 'json': {'data': list}},
+    'settings': {'path': '/api/settings', 'json': {'data': dict}},
+    'partners': {'path': '/api/partners?status=active&limit=20', 'json': {'data': list, 'count': int}},
+    'questions': {'path': '/api/questions?limit=20', 'json': {'data': list}},
+    'orders': {'path': '/api/orders?limit=20', 'json': {'data': list}},
+}
+# Entry chunks discovered from index.html; names stay stable across builds
+ASSET_PATTERN = re.compile(r'(?:src|href)="(/assets/index-[^"]+\.(?:js|css))"')
+
+
+class Worker(threading.Thread):
+    """Drains the job queue over a single keep-alive connection."""
+
+    def __init__(self, base, context, jobs, results):
+        super().__init__(daemon=True)
+        self.jobs, self.results = jobs, results
+        self.connection = keepalive.Connection(base, context, TIMEOUT, 'smoke-gate/1.0')
+
+    def run(self):
+        while True:
+            name, path = self.jobs.get()
+            if name is None:
+                break
+            try:
+                status, raw, body, elapsed = self.connection.get(path, {'Accept-Encoding': 'gzip'})
+                self.results.append({'name': name, 'status': status, 'ms': elapsed,
+                                     'wire_bytes': len(raw), 'bytes': len(body), 'body': body})
+            except (OSError, http.client.HTTPException) as e:
+                self.results.append({'name': name, 'error': f'{type(e).__name__}: {e}'})
+        self.connection.close()
+
+
+def run_matrix(base_url, endpoints, samples, concurrency, context):
+    base = urlsplit(base_url)
+    jobs, results = queue.Queue(), []
+    # Interleave samples so every endpoint sees a warm and a cold-ish connection
+    for _ in range(samples):
+        for name, spec in endpoints.items():
+            jobs.put((name, spec['path']))
+    workers = [Worker(base, context, jobs, results) for _ in range(concurrency)]
+    for worker in workers:
+        jobs.put((None, None))
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def validate(spec, result):
+    """Return a list of problems with one response."""
+    if 'error' in result:
+        return [result['error']]
+    problems = []
+    if result['status'] != spec.get('status', 200):
+        problems.append(f"status {result['status']} (expected {spec.get('status', 200)})")
+    text = result['body'].decode('utf-8', errors='replace')
+    if 'contains' in spec and spec['contains'] not in text:
+        problems.append(f"body does not contain {spec['contains']!r}")
+    if 'json' in spec:
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return problems + ['body is not JSON']
+        for key, expected in spec['json'].items():
+            if not isinstance(payload, dict) or key not in payload:
+                problems.append(f'missing key {key!r}')
+            elif not isinstance(payload[key], expected):
+                problems.append(f'{key!r} is {type(payload[key]).__name__}, expected {expected.__name__}')
+    return problems
+
+
+def discover_assets(results, endpoints):
+    """Add the entry JS/CSS referenced by index.html to the matrix."""
+    for result in results:
+        if result['name'] == 'index' and 'body' in result:
+            for path in sorted(set(ASSET_PATTERN.findall(result['body'].decode('utf-8', 'replace')))):
+                endpoints[f"entry{os.path.splitext(path)[1]}"] = {'path': path}
+            return
+
+
+def summarize(results):
+    summary = {}
+    for name in {r['name'] for r in results}:
+        ok = [r for r in results if r['name'] == name and 'error' not in r]
+        if ok:
+            summary[name] = {
+                'ms': round(statistics.median(r['ms'] for r in ok), 1),
+                'wire_bytes': int(statistics.median(r['wire_bytes'] for r in ok)),
+                'bytes': int(statistics.median(r['bytes'] for r in ok)),
+            }
+    return summary
+
+
+def current_release():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime('%Y%m%d-%H%M%S')
+
+
+def load_baseline(release):
+    """Most recent passing baseline recorded for a different release."""
+    try:
+        names = sorted(os.listdir(BASELINE_DIR), key=lambda n: os.path.getmtime(os.path.join(BASELINE_DIR, n)))
+    except OSError:
+        return None
+    for name in reversed(names):
+        if name.endswith('.json') and name != f'{release}.json':
+            with open(os.path.join(BASELINE_DIR, name), encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def save_baseline(release, summary):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(os.path.join(BASELINE_DIR, f'{release}.json'), 'w', encoding='utf-8') as f:
+        json.dump({'release': release, 'created': time.time(), 'endpoints': summary}, f, indent=2)
+
+
+def compare(summary, baseline, threshold, size_threshold, min_ms):
+    """Latency/size regressions against the baseline as {name: [messages]}."""
+    regressions = {}
+    for name, current in summary.items():
+        previous = baseline['endpoints'].get(name)
+        if not previous:
+            continue
+        messages = []
+        if current['ms'] > previous['ms'] * (1 + threshold) and current['ms'] - previous['ms'] > min_ms:
+            messages.append(f"latency {previous['ms']:.0f} -> {current['ms']:.0f} ms")
+        if previous['wire_bytes'] and current['wire_bytes'] > previous['wire_bytes'] * (1 + size_threshold):
+            messages.append(f"size {previous['wire_bytes']:,} -> {current['wire_bytes']:,} B")
+        if messages:
+            regressions[name] = messages
+    return regressions
+
+
+def load_switch(target):
+    try:
+        with open(os.path.join(SWITCH_DIR, f'{target}.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def forget_switches(targets):
+    for target in targets:
+        path = os.path.join(SWITCH_DIR, f'{target}.json')
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def rollback(targets):
+    """Undo the switches the last `release.py deploy` made, and nothing else."""
+    for target in targets:
+        switch = load_switch(target)
+        if not switch:
+            print(f"\n⏭  {target} was not switched by this deploy, leaving it alone")
+            continue
+        print(f"\n⏪ Rolling back {target}: {switch['release']} -> {switch['previous']}")
+        result = subprocess.run([sys.executable, os.path.join(ROOT, 'release.py'), 'rollback', target,
+                                 switch['previous'], '--expect', switch['release']], check=False)
+        if result.returncode == 0:
+            forget_switches([target])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--samples', type=int, default=5, help='requests per endpoint (default 5)')
+    parser.add_argument('--concurrency', type=int, default=6, help='parallel keep-alive connections')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed median latency growth (0.5 = +50%%)')
+    parser.add_argument('--size-threshold', type=float, default=0.25, help='allowed payload growth')
+    parser.add_argument('--min-ms', type=float, default=50, help='ignore latency changes smaller than this')
+    parser.add_argument('--release', default=None, help='label for this run (default: git short hash)')
+    parser.add_argument('--rollback', default='', help='comma-separated release.py targets to roll back on failure')
+    parser.add_argument('--insecure', action='store_true', help='do not verify TLS certificates')
+    parser.add_argument('--no-save', action='store_true', help='do not store this run as a baseline')
+    args = parser.parse_args()
+
+    context = ssl.create_default_context()
+    if args.insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    release = args.release or current_release()
+    endpoints = dict(ENDPOINTS)
+    print(f"💨 Smoke testing {args.base_url} (release {release})")
+
+    # index.html first to learn the entry chunk names, then the full matrix
+    discover_assets(run_matrix(args.base_url, {'index': endpoints['index']}, 1, 1, context), endpoints)
+    started = time.perf_counter()
+    results = run_matrix(args.base_url, endpoints, args.samples, args.concurrency, context)
+    elapsed = time.perf_counter() - started
+
+    failures = {}
+    for result in results:
+        problems = validate(endpoints[result['name']], result)
+        if problems:
+            failures.setdefault(result['name'], set()).update(problems)
+
+    summary = summarize(results)
+    baseline = load_baseline(release)
+    regressions = compare(summary, baseline, args.threshold, args.size_threshold, args.min_ms) if baseline else {}
+
+    print(f"\n{'endpoint':<20} {'p50 ms':>8} {'base ms':>8} {'wire B':>10} {'base B':>10}  result")
+    print('-' * 80)
+    for name in endpoints:
+        current = summary.get(name, {})
+        previous = (baseline or {}).get('endpoints', {}).get(name, {})
+        if name in failures:
+            verdict = '❌ ' + '; '.join(sorted(failures[name]))
+        elif name in regressions:
+            verdict = '📈 ' + '; '.join(regressions[name])
+        else:
+            verdict = '✅'
+        print(f"{name:<20} {current.get('ms', '-'):>8} {previous.get('ms', '-'):>8} "
+              f"{current.get('wire_bytes', '-'):>10} {previous.get('wire_bytes', '-'):>10}  {verdict}")
+    print(f"\n{len(results)} requests in {elapsed:.2f}s over {args.concurrency} connections; "
+          f"baseline: {baseline['release'] if baseline else 'none'}")
+
+    if failures or regressions:
+        print(f"\n❌ Smoke gate failed: {len(failures)} broken, {len(regressions)} regressed")
+        if args.rollback:
+            rollback([target for target in args.rollback.split(',') if target])
+        sys.exit(1)
+
+    if not args.no_save:
+        save_baseline(release, summary)
+    # The deployed releases are verified; a later failing run must not undo them
+    forget_switches([target for target in args.rollback.split(',') if target])
+    print("\n✅ Smoke gate passed")
+
+
+if __name__ == '__main__':
+    main()
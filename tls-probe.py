@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Concurrent TLS/HTTP probe with a per-phase timing breakdown.
+
+Runs from the local machine (no SSH) against every configured domain and path
+in parallel and reports DNS, TCP connect, TLS handshake, TTFB and total time,
+the negotiated ALPN protocol (h2 or http/1.1), TLS version and certificate
+expiry. Each run is appended to .ops/tls-probe.jsonl and compared with the
+median of previous runs.
+
+Usage:
+    python tls-probe.py
+    python tls-probe.py --runs 5
+    python tls-probe.py --url https://localhost:8443/ --cafile cert.pem
+    python tls-probe.py --resolve ayvazyan-rekomenduet.ru:443:85.198.67.7
+"""
+import argparse
+import json
+import os
+import socket
+import ssl
+import statistics
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DOMAIN = 'ayvazyan-rekomenduet.ru'
+DOMAINS = [DOMAIN, f'www.{DOMAIN}']
+PATHS = ['/', '/health', '/api/categories']
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(ROOT, '.ops', 'tls-probe.jsonl')
+TIMEOUT = 10
+CERT_WARN_DAYS = 14
+PHASES = ['dns', 'connect', 'tls', 'ttfb', 'total']
+
+# HTTP/2 frame types and flags used by the minimal client below
+H2_DATA, H2_HEADERS, H2_RST_STREAM, H2_SETTINGS, H2_PING, H2_GOAWAY, H2_WINDOW_UPDATE = 0, 1, 3, 4, 6, 7, 8
+H2_END_STREAM, H2_ACK, H2_END_HEADERS, H2_PADDED, H2_PRIORITY = 0x1, 0x1, 0x4, 0x8, 0x20
+H2_PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+# HPACK static table entries for :status
+H2_STATUS_INDEX = {8: 200, 9: 204, 10: 206, 11: 304, 12: 400, 13: 404, 14: 500}
+# HPACK Huffman codes for the digits, enough to decode any :status value
+HPACK_DIGITS = {
+    '00000': '0', '00001': '1', '00010': '2', '011001': '3', '011010': '4',
+    '011011': '5', '011100': '6', '011101': '7', '011110': '8', '011111': '9',
+}
+
+
+def ms(start, end):
+    return round((end - start) * 1000, 1)
+
+
+def recv_exact(sock, n):
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError('connection closed mid-frame')
+        data += chunk
+    return data
+
+
+def h2_frame(frame_type, flags, stream, payload=b''):
+    return struct.pack('>I', len(payload))[1:] + struct.pack('>BBI', frame_type, flags, stream) + payload
+
+
+def hpack_int(value, prefix_bits, first=0):
+    limit = (1 << prefix_bits) - 1
+    if value < limit:
+        return bytes([first | value])
+    out = [first | limit]
+    value -= limit
+    while value >= 128:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def hpack_literal(name, value):
+    """Literal header field without indexing, new name, no Huffman coding."""
+    name, value = name.encode(), value.encode()
+    return b'\x00' + hpack_int(len(name), 7) + name + hpack_int(len(value), 7) + value
+
+
+def h2_status(block):
+    """Best-effort :status from the first field of a response header block."""
+    if not block:
+        return None
+    first = block[0]
+    if first & 0x80:
+        return H2_STATUS_INDEX.get(first & 0x7f)
+    # Literal with an indexed :status name; only plain (non-Huffman) values
+    if first & 0xc0 == 0x40:
+        index = first & 0x3f
+    elif first & 0xe0 == 0x00:
+        index = first & 0x0f
+    else:
+        return None
+    if index not in H2_STATUS_INDEX or len(block) < 2:
+        return None
+    value = block[2:2 + (block[1] & 0x7f)]
+    if block[1] & 0x80:
+        value = huffman_digits(value)
+    return int(value) if value.isdigit() else None
+
+
+def huffman_digits(data):
+    """Decode a Huffman-coded HPACK string made only of digits."""
+    bits = ''.join(f'{byte:08b}' for byte in data)
+    out, code = b'', ''
+    for bit in bits:
+        code += bit
+        if code in HPACK_DIGITS:
+            out += HPACK_DIGITS[code].encode()
+            code = ''
+        elif len(code) > 6:
+            return b''
+    # Trailing bits must be EOS padding (all ones)
+    return out if set(code) <= {'1'} else b''
+
+
+def request_h2(sock, host, path):
+    """Send one GET over HTTP/2; return (status, body_bytes, ttfb_time)."""
+    headers = b''.join(hpack_literal(k, v) for k, v in [
+        (':method', 'GET'), (':scheme', 'https'), (':path', path), (':authority', host),
+        ('user-agent', 'tls-probe/1.0'),
+    ])
+    settings = struct.pack('>HI', 2, 0) + struct.pack('>HI', 4, 2 ** 31 - 1)
+    sock.sendall(H2_PREFACE
+                 + h2_frame(H2_SETTINGS, 0, 0, settings)
+                 + h2_frame(H2_WINDOW_UPDATE, 0, 0, struct.pack('>I', 2 ** 30))
+                 + h2_frame(H2_HEADERS, H2_END_STREAM | H2_END_HEADERS, 1, headers))
+    status, size, ttfb = None, 0, None
+    while True:
+        header = recv_exact(sock, 9)
+        length = struct.unpack('>I', b'\0' + header[:3])[0]
+        frame_type, flags, stream = header[3], header[4], struct.unpack('>I', header[5:])[0] & 0x7fffffff
+        payload = recv_exact(sock, length)
+        if frame_type == H2_SETTINGS and not flags & H2_ACK:
+            sock.sendall(h2_frame(H2_SETTINGS, H2_ACK, 0))
+        elif frame_type == H2_PING and not flags & H2_ACK:
+            sock.sendall(h2_frame(H2_PING, H2_ACK, 0, payload))
+        elif frame_type == H2_GOAWAY:
+            raise ConnectionError('server sent GOAWAY')
+        elif frame_type == H2_RST_STREAM and stream == 1:
+            raise ConnectionError('server reset the stream')
+        elif stream == 1 and frame_type in (H2_HEADERS, H2_DATA):
+            if ttfb is None:
+                ttfb = time.perf_counter()
+            if flags & H2_PADDED:
+                payload = payload[1:len(payload) - payload[0]]
+            if frame_type == H2_HEADERS:
+                if flags & H2_PRIORITY:
+                    payload = payload[5:]
+                status = status or h2_status(payload)
+            else:
+                size += len(payload)
+            if flags & H2_END_STREAM:
+                return status, size, ttfb
+
+
+def request_http1(sock, host, path):
+    """Send one GET over HTTP/1.1 with Connection: close; return (status, body_bytes, ttfb_time)."""
+    sock.sendall((f'GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: tls-probe/1.0\r\n'
+                  f'Accept-Encoding: identity\r\nConnection: close\r\n\r\n').encode())
+    data = sock.recv(65536)
+    ttfb = time.perf_counter()
+    chunks = [data]
+    while data:
+        data = sock.recv(65536)
+        chunks.append(data)
+    response = b''.join(chunks)
+    head, _, body = response.partition(b'\r\n\r\n')
+    status_line = head.split(b'\r\n', 1)[0].split()
+    status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else None
+    return status, len(body), ttfb
+
+
+def certificate_info(cert, der):
+    """Subject and expiry from getpeercert() output, decoding the DER when it is empty."""
+    if cert:
+        expires = ssl.cert_time_to_seconds(cert['notAfter'])
+        common_name = dict(item[0] for item in cert.get('subject', ())).get('commonName')
+    else:
+        # Verification disabled: the parsed form is empty, decode the DER ourselves
+        # (cryptography comes with paramiko)
+        from cryptography import x509
+        from cryptography.x509.oid import NameOID
+        parsed = x509.load_der_x509_certificate(der)
+        expires = parsed.not_valid_after_utc.timestamp()
+        names = parsed.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+        common_name = names[0].value if names else None
+    return {
+        'cert_subject': common_name,
+        'cert_expires': time.strftime('%Y-%m-%d', time.gmtime(expires)),
+        'cert_days': int((expires - time.time()) // 86400),
+    }
+
+
+def probe(url, context, resolve, allow_h2):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 443
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    result = {'url': url, 'ts': time.time()}
+    try:
+        t0 = time.perf_counter()
+        if (host, port) in resolve:
+            addr = (socket.AF_INET6 if ':' in resolve[host, port] else socket.AF_INET, (resolve[host, port], port))
+        else:
+            info = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+            addr = (info[0], info[4])
+        t_dns = time.perf_counter()
+        raw = socket.socket(addr[0], socket.SOCK_STREAM)
+        raw.settimeout(TIMEOUT)
+        try:
+            raw.connect(addr[1])
+            t_connect = time.perf_counter()
+            sock = context.wrap_socket(raw, server_hostname=host)
+        except BaseException:
+            raw.close()
+            raise
+        with sock:
+            t_tls = time.perf_counter()
+            alpn = sock.selected_alpn_protocol()
+            result.update(alpn=alpn or 'http/1.1', tls_version=sock.version(), cipher=sock.cipher()[0],
+                          address=addr[1][0])
+            # Copy the certificate now, decode it after the timed phases
+            peer = sock.getpeercert(), sock.getpeercert(binary_form=True)
+            t_request = time.perf_counter()
+            if alpn == 'h2' and allow_h2:
+                status, size, t_first = request_h2(sock, host, path)
+            else:
+                status, size, t_first = request_http1(sock, host, path)
+            t_done = time.perf_counter()
+        result.update(certificate_info(*peer))
+        result.update(status=status, bytes=size, dns=ms(t0, t_dns), connect=ms(t_dns, t_connect),
+                      tls=ms(t_connect, t_tls), ttfb=ms(t_request, t_first), total=ms(t0, t_done))
+    except (OSError, ssl.SSLError, ConnectionError, ValueError) as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+
+def load_history():
+    history = {}
+    try:
+        with open(HISTORY_FILE, encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if 'error' not in entry:
+                    history.setdefault(entry['url'], []).append(entry)
+    except (OSError, ValueError):
+        pass
+    return history
+
+
+def save_history(results):
+    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def trend(current, previous):
+    """Percent change of current total time against the median of recent runs."""
+    if not previous:
+        return ''
+    baseline = statistics.median(entry['total'] for entry in previous[-20:])
+    if not baseline:
+        return ''
+    change = (current - baseline) / baseline * 100
+    return f'{change:+.0f}% vs median {baseline:.0f}ms'
+
+
+def report(results, history):
+    print(f"\n{'URL':<48} {'proto':<8} {'st':>3} " + ' '.join(f'{p:>8}' for p in PHASES) + '  trend')
+    print('-' * 130)
+    for result in sorted(results, key=lambda r: (r['url'], r['ts'])):
+        if 'error' in result:
+            print(f"{result['url']:<48} ❌ {result['error']}")
+            continue
+        times = ' '.join(f"{result[p]:>6.1f}ms" for p in PHASES)
+        print(f"{result['url']:<48} {result['alpn']:<8} {result['status'] or '?':>3} {times}  "
+              f"{trend(result['total'], history.get(result['url']))}")
+
+    print("\nCertificates:")
+    seen = set()
+    for result in results:
+        host = urlsplit(result['url']).netloc
+        if 'error' in result or host in seen:
+            continue
+        seen.add(host)
+        flag = '⚠️ ' if result['cert_days'] < CERT_WARN_DAYS else '✅'
+        print(f"  {flag} {host:<40} {result['tls_version']:<8} {result['cipher']:<32} "
+              f"expires {result['cert_expires']} ({result['cert_days']} days)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', action='append', help='probe this URL instead of the configured matrix')
+    parser.add_argument('--runs', type=int, default=1, help='probes per URL (default 1)')
+    parser.add_argument('--resolve', action='append', default=[], metavar='HOST:PORT:ADDR',
+                        help='skip DNS and connect HOST:PORT to ADDR')
+    parser.add_argument('--cafile', help='trust this CA bundle (e.g. a self-signed test cert)')
+    parser.add_argument('--insecure', action='store_true', help='do not verify certificates')
+    parser.add_argument('--http1', action='store_true', help='do not offer h2 in ALPN')
+    parser.add_argument('--no-history', action='store_true', help='do not record this run')
+    args = parser.parse_args()
+
+    urls = args.url or [f'https://{domain}{path}' for domain in DOMAINS for path in PATHS]
+    resolve = {}
+    for item in args.resolve:
+        host, port, addr = item.split(':', 2)
+        resolve[host, int(port)] = addr
+
+    context = ssl.create_default_context(cafile=args.cafile)
+    if args.insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    context.set_alpn_protocols(['http/1.1'] if args.http1 else ['h2', 'http/1.1'])
+
+    jobs = [url for url in urls for _ in range(args.runs)]
+    with ThreadPoolExecutor(max_workers=min(32, len(jobs))) as pool:
+        results = list(pool.map(lambda url: probe(url, context, resolve, not args.http1), jobs))
+
+    history = load_history()
+    report(results, history)
+    if not args.no_history:
+        save_history(results)
+
+    failed = [r for r in results if 'error' in r or (r.get('status') or 0) >= 500]
+    expiring = [r for r in results if r.get('cert_days', CERT_WARN_DAYS) < CERT_WARN_DAYS]
+    if failed or expiring:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
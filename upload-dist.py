@@ -1,12 +1,9 @@
-import paramiko
-import os
+import release
 
 print("Uploading built files to server...")
 
 # Connect
-c = paramiko.SSHClient()
-c.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-c.connect('85.198.67.7', username='root', password='j8!RMiWztLw1')
+c = release.connect()
 
 # Setup server
 print("Setting up server...")
@@ -29,31 +26,11 @@ echo SETUP_DONE
 ''')
 print(stdout.read().decode())
 
-# Upload files via SFTP
-print("Uploading files...")
-sftp = c.open_sftp()
+# Ship dist as a new release: /var/www/app/dist is a symlink into
+# /var/www/releases/frontend, whose files are hardlinks shared with older
+# releases, so it must never be written in place
+release.deploy(c, 'frontend')
 
-dist_dir = r'D:\PROJECT\sweet-style-saver\dist'
-remote_dir = '/var/www/app/dist'
-
-def upload_dir(local_dir, remote_dir):
-    for item in os.listdir(local_dir):
-        local_path = os.path.join(local_dir, item)
-        remote_path = f"{remote_dir}/{item}"
-        
-        if os.path.isfile(local_path):
-            print(f"  Uploading {item}...")
-            sftp.put(local_path, remote_path)
-        elif os.path.isdir(local_path):
-            try:
-                sftp.mkdir(remote_path)
-            except:
-                pass
-            upload_dir(local_path, remote_path)
-
-upload_dir(dist_dir, remote_dir)
-
-sftp.close()
 c.close()
 
 print("\nDeployment COMPLETE!")
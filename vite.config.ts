@@ -9,6 +9,12 @@ export default defineConfig(({ mode }) => ({
     host: "::",
     port: 8080,
   },
+  build: {
+    // dist/.vite/manifest.json: chunk graph for warm-cache.py and bundle-size.py
+    manifest: true,
+    // Maps without sourceMappingURL, for bundle-size.py; release.py does not ship them
+    sourcemap: "hidden",
+  },
   plugins: [react(), mode === "development" && componentTagger()].filter(Boolean),
   resolve: {
     alias: {
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Post-deploy cache warmer for static assets and hot API routes.
+
+Static phase: reads the freshly built dist (index.html plus the Vite manifest
+in dist/.vite/manifest.json) and fetches every critical chunk through nginx -
+entry points and their static import closure, with CSS and assets - so the
+page cache on the server holds the new files before users ask for them. Each
+body is checked against the local build, which also catches a stale deploy.
+
+API phase: replays a weighted mix of hot read routes over a few keep-alive
+connections in rounds until the median latency of consecutive rounds settles,
+which warms Postgres buffers, the pg pool and V8's optimized code paths.
+
+Usage:
+    python warm-cache.py                   # static + API
+    python warm-cache.py --static-only     # after a frontend release
+    python warm-cache.py --api-only        # after a backend release / pm2 reload
+    python warm-cache.py --base-url https://localhost:8443 --insecure
+    python warm-cache.py --strict          # exit 1 on failed or mismatched fetches
+
+Problems are reported but do not fail the run unless --strict is given:
+deciding whether a release is broken, and rolling it back, is smoke-gate.py's
+job, and the deploy pipeline must reach it.
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import re
+import ssl
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import keepalive
+
+DOMAIN = 'ayvazyan-rekomenduet.ru'
+BASE_URL = f'https://{DOMAIN}'
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(ROOT, 'dist')
+MANIFEST = os.path.join('.vite', 'manifest.json')
+TIMEOUT = 15
+
+# path -> relative weight, roughly the mix the Mini App generates on open
+HOT_ROUTES = {
+    '/api/categories?is_active=true': 8,
+    '/api/professions': 6,
+    '/api/settings': 6,
+    '/api/card-templates': 4,
+    '/api/partners?status=active&limit=20&offset=0': 10,
+    '/api/partners?status=active&limit=20&offset=20': 4,
+    '/api/partners?status=active&limit=20&offset=40': 2,
+    '/api/categories': 2,
+}
+HTML_REFERENCE = re.compile(r'(?:src|href)="(/[^"]+\.(?:js|css|ico|svg|png|woff2?))"')
+
+
+def critical_files(dist, include_lazy):
+    """Files the first page load needs, in load order, relative to dist."""
+    files = []
+
+    def add(name):
+        if name not in files:
+            files.append(name)
+
+    manifest_path = os.path.join(dist, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        def visit(key, seen):
+            if key in seen or key not in manifest:
+                return
+            seen.add(key)
+            chunk = manifest[key]
+            for child in chunk.get('imports', []):
+                visit(child, seen)
+            add(chunk['file'])
+            for name in chunk.get('css', []) + chunk.get('assets', []):
+                add(name)
+
+        seen = set()
+        for key, chunk in manifest.items():
+            if chunk.get('isEntry'):
+                visit(key, seen)
+        if include_lazy:
+            for key, chunk in manifest.items():
+                if chunk.get('isDynamicEntry'):
+                    visit(key, seen)
+    else:
+        print(f"⚠️  {MANIFEST} not found, using index.html references only")
+
+    with open(os.path.join(dist, 'index.html'), encoding='utf-8') as f:
+        for path in HTML_REFERENCE.findall(f.read()):
+            if os.path.exists(os.path.join(dist, path.lstrip('/'))):
+                add(path.lstrip('/'))
+    return files
+
+
+def run_parallel(base, context, jobs, concurrency, handle):
+    """Run handle(connection, job) for every job over `concurrency` keep-alive connections."""
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+
+    def worker():
+        connection = keepalive.Connection(base, context, TIMEOUT, 'warm-cache/1.0')
+        try:
+            while True:
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                handle(connection, job)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def warm_static(base, context, dist, concurrency, include_lazy):
+    files = ['index.html'] + critical_files(dist, include_lazy)
+    print(f"\n📦 Prefetching {len(files)} critical files from {dist}")
+    results, problems = {}, []
+
+    def handle(connection, name):
+        path = '/' if name == 'index.html' else f'/{name}'
+        with open(os.path.join(dist, name), 'rb') as f:
+            expected = hashlib.sha256(f.read()).hexdigest()
+        timings = []
+        try:
+            # First fetch is the cold one, the second shows the warm latency
+            for _ in range(2):
+                status, _, body, elapsed = connection.get(path, {'Accept-Encoding': 'gzip'})
+                timings.append(elapsed)
+        except (OSError, http.client.HTTPException) as e:
+            problems.append(f"{path}: {type(e).__name__}: {e}")
+            return
+        if status != 200:
+            problems.append(f"{path}: status {status}")
+        elif hashlib.sha256(body).hexdigest() != expected:
+            problems.append(f"{path}: served content differs from local build")
+        results[name] = (timings[0], timings[1], len(body))
+
+    run_parallel(base, context, files, concurrency, handle)
+    print(f"   {'file':<48} {'cold ms':>8} {'warm ms':>8} {'bytes':>10}")
+    for name in files:
+        if name in results:
+            cold, warm, size = results[name]
+            print(f"   {name[-48:]:<48} {cold:>8.1f} {warm:>8.1f} {size:>10,}")
+    return problems
+
+
+def warm_api(base, context, concurrency, round_size, tolerance, max_rounds, seed):
+    rng = random.Random(seed)
+    routes, weights = list(HOT_ROUTES), list(HOT_ROUTES.values())
+    print(f"\n🔥 Replaying hot API routes: {round_size} requests/round, {concurrency} connections")
+
+    samples = {route: [] for route in routes}
+    problems, history, lock = [], [], threading.Lock()
+
+    def handle(connection, route):
+        try:
+            status, _, body, elapsed = connection.get(route, {'Accept-Encoding': 'gzip', 'Accept': 'application/json'})
+        except (OSError, http.client.HTTPException) as e:
+            with lock:
+                problems.append(f"{route}: {type(e).__name__}: {e}")
+            return
+        with lock:
+            if status != 200:
+                problems.append(f"{route}: status {status}")
+            samples[route].append(elapsed)
+            current.append(elapsed)
+
+    # Round 0: each route once, sequentially, so cold numbers are not hidden by concurrency
+    current = []
+    run_parallel(base, context, routes, 1, handle)
+    cold = {route: samples[route][0] for route in routes if samples[route]}
+    stable = 0
+    for number in range(1, max_rounds + 1):
+        current = []
+        run_parallel(base, context, rng.choices(routes, weights, k=round_size), concurrency, handle)
+        if not current:
+            break
+        p50 = statistics.median(current)
+        change = (p50 - history[-1]) / history[-1] if history else None
+        history.append(p50)
+        print(f"   round {number:>2}: p50 {p50:7.1f} ms" + (f"  ({change:+.0%} vs previous)" if change is not None else ''))
+        stable = stable + 1 if change is not None and abs(change) <= tolerance else 0
+        if stable >= 2:
+            break
+    else:
+        print(f"   ⚠️  latency did not settle within {max_rounds} rounds")
+
+    print(f"\n   {'route':<48} {'cold ms':>8} {'warm p50':>9} {'n':>5}")
+    for route in routes:
+        warm = samples[route][-max(3, len(samples[route]) // 3):]
+        if route in cold:
+            print(f"   {route:<48} {cold[route]:>8.1f} {statistics.median(warm):>9.1f} {len(samples[route]):>5}")
+    if cold and history:
+        print(f"\n   median cold {statistics.median(cold.values()):.1f} ms -> warm {history[-1]:.1f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--dist', default=DIST_DIR, help='local build to read the manifest from')
+    parser.add_argument('--static-only', action='store_true')
+    parser.add_argument('--api-only', action='store_true')
+    parser.add_argument('--lazy', action='store_true', help='also prefetch dynamically imported chunks')
+    parser.add_argument('--concurrency', type=int, default=4, help='parallel keep-alive connections (default 4)')
+    parser.add_argument('--round-size', type=int, default=40, help='API requests per round (default 40)')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='stop when round p50 changes less than this twice in a row (default 0.1)')
+    parser.add_argument('--max-rounds', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=None, help='seed for the weighted route mix')
+    parser.add_argument('--insecure', action='store_true', help='do not verify TLS certificates')
+    parser.add_argument('--strict', action='store_true', help='exit 1 when any fetch fails')
+    args = parser.parse_args()
+
+    context = ssl.create_default_context()
+    if args.insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    base = urlsplit(args.base_url)
+
+    print(f"🌡  Warming {args.base_url}")
+    started = time.perf_counter()
+    problems = []
+    if not args.api_only:
+        if not os.path.exists(os.path.join(args.dist, 'index.html')):
+            sys.exit(f"❌ {args.dist}/index.html not found, build the frontend first")
+        problems += warm_static(base, context, args.dist, args.concurrency, args.lazy)
+    if not args.static_only:
+        problems += warm_api(base, context, args.concurrency, args.round_size, args.tolerance,
+                             args.max_rounds, args.seed)
+
+    print(f"\nDone in {time.perf_counter() - started:.1f}s")
+    if problems:
+        print(f"\n{'❌' if args.strict else '⚠️ '} {len(problems)} problem(s):")
+        for problem in sorted(set(problems)):
+            print(f"   {problem}")
+        if args.strict:
+            sys.exit(1)
+        return
+    print("✅ Caches warm")
+
+
+if __name__ == '__main__':
+    main()